@@ -6,7 +6,6 @@ from sqlalchemy import pool
 from alembic import context
 
 from database import DATABASE_URL, Base
-from dotenv import load_dotenv
 
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,38 @@
+"""Add unique constraint on favorites (user_id, restaurant_id)
+
+Revision ID: 2f9c4e6a8b1d
+Revises: 8d41f0a6c2e7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f9c4e6a8b1d'
+down_revision: Union[str, Sequence[str], None] = '8d41f0a6c2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Double taps could insert the same favorite twice; keep the oldest row
+    op.execute(
+        """
+        DELETE FROM favorites duplicate
+        USING favorites original
+        WHERE duplicate.user_id = original.user_id
+          AND duplicate.restaurant_id = original.restaurant_id
+          AND duplicate.id > original.id
+        """
+    )
+    op.create_unique_constraint('uq_favorites_user_restaurant', 'favorites', ['user_id', 'restaurant_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_favorites_user_restaurant', 'favorites', type_='unique')
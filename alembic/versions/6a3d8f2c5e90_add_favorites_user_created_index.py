@@ -0,0 +1,28 @@
+"""Add favorites (user_id, created_at, id) index for keyset pagination
+
+Revision ID: 6a3d8f2c5e90
+Revises: 2f9c4e6a8b1d
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3d8f2c5e90'
+down_revision: Union[str, Sequence[str], None] = '2f9c4e6a8b1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_favorites_user_created', 'favorites', ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_favorites_user_created', table_name='favorites')
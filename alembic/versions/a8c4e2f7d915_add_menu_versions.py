@@ -0,0 +1,65 @@
+"""Add menu_versions table and menu version columns
+
+Revision ID: a8c4e2f7d915
+Revises: f3a9d6b2c8e1
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f7d915'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d6b2c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'menu_versions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('restaurant_id', sa.Integer(), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.UniqueConstraint('restaurant_id', 'version', name='uq_menu_versions_restaurant_version'),
+    )
+    op.create_index('ix_menu_versions_id', 'menu_versions', ['id'])
+    op.add_column('restaurants', sa.Column('menu_version', sa.Integer(), server_default='0', nullable=False))
+    # Added to the partitioned table, so to every partition
+    op.add_column('orders', sa.Column('menu_version', sa.Integer(), nullable=True))
+    op.add_column('carts', sa.Column('menu_version', sa.Integer(), nullable=True))
+
+    # Publish version 1 of every existing menu, rendered like schemas.menu.MenuVersionResponse
+    op.execute(
+        """
+        INSERT INTO menu_versions (restaurant_id, version, body)
+        SELECT restaurant_id, 1, json_build_object(
+            'restaurant_id', restaurant_id,
+            'version', 1,
+            'items', json_agg(json_build_object(
+                'name', name, 'description', description, 'price', price, 'is_available', is_available,
+                'category', category, 'id', id, 'restaurant_id', restaurant_id,
+                'created_at', created_at, 'updated_at', updated_at
+            ) ORDER BY id)
+        )::text
+        FROM menu_items
+        WHERE restaurant_id IS NOT NULL
+        GROUP BY restaurant_id
+        """
+    )
+    op.execute("UPDATE restaurants SET menu_version = 1 WHERE id IN (SELECT restaurant_id FROM menu_versions)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('carts', 'menu_version')
+    op.drop_column('orders', 'menu_version')
+    op.drop_column('restaurants', 'menu_version')
+    op.drop_index('ix_menu_versions_id', table_name='menu_versions')
+    op.drop_table('menu_versions')
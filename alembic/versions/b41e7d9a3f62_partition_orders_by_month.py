@@ -0,0 +1,117 @@
+"""Partition orders by month on created_at
+
+Revision ID: b41e7d9a3f62
+Revises: 6a3d8f2c5e90
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e7d9a3f62'
+down_revision: Union[str, Sequence[str], None] = '6a3d8f2c5e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = "id, user_id, restaurant_id, items, status, total_price, created_at, updated_at"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(bind) -> bool:
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+        "WHERE relname = 'orders')"
+    )).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if _is_partitioned(bind):
+        return # Created partitioned by Base.metadata.create_all
+
+    # Keep the old table (and its sequence) aside while the data is copied
+    op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+    op.execute("ALTER TABLE orders_unpartitioned RENAME CONSTRAINT orders_pkey TO orders_unpartitioned_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_orders_id RENAME TO ix_orders_unpartitioned_id")
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            restaurant_id INTEGER REFERENCES restaurants (id),
+            items JSON,
+            status orderstatus NOT NULL,
+            total_price FLOAT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT orders_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+
+    # One partition per month from the oldest order up to MONTHS_AHEAD months from now
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM orders_unpartitioned")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = min(oldest.astimezone(timezone.utc).date().replace(day=1), current) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE orders_{month:%Y_%m} PARTITION OF orders "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+        )
+        month = end
+
+    op.execute(
+        f"INSERT INTO orders ({COLUMNS}) "
+        f"SELECT id, user_id, restaurant_id, items, status, total_price, COALESCE(created_at, now()), updated_at "
+        f"FROM orders_unpartitioned"
+    )
+    op.execute("DROP TABLE orders_unpartitioned")
+
+    op.create_index('ix_orders_id', 'orders', ['id'])
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at'])
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+    op.execute("ALTER TABLE orders_partitioned RENAME CONSTRAINT orders_pkey TO orders_partitioned_pkey")
+    op.execute("ALTER INDEX ix_orders_id RENAME TO ix_orders_partitioned_id")
+    op.execute("DROP INDEX ix_orders_user_created")
+    op.execute("DROP INDEX ix_orders_created_at")
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            restaurant_id INTEGER REFERENCES restaurants (id),
+            items JSON,
+            status orderstatus NOT NULL,
+            total_price FLOAT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT orders_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute(f"INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_partitioned")
+    # Dropping the parent drops every partition still attached; archived ones are not restored
+    op.execute("DROP TABLE orders_partitioned")
+    op.create_index('ix_orders_id', 'orders', ['id'])
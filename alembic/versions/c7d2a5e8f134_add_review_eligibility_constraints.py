@@ -0,0 +1,43 @@
+"""Add unique review per user and restaurant and delivered orders index
+
+Revision ID: c7d2a5e8f134
+Revises: b41e7d9a3f62
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2a5e8f134'
+down_revision: Union[str, Sequence[str], None] = 'b41e7d9a3f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent submissions could store two reviews; keep the first one
+    op.execute(
+        """
+        DELETE FROM reviews duplicate
+        USING reviews original
+        WHERE duplicate.user_id = original.user_id
+          AND duplicate.restaurant_id = original.restaurant_id
+          AND duplicate.id > original.id
+        """
+    )
+    op.create_unique_constraint('uq_reviews_user_restaurant', 'reviews', ['user_id', 'restaurant_id'])
+    op.create_index(
+        'ix_orders_user_restaurant_delivered', 'orders', ['user_id', 'restaurant_id'],
+        postgresql_where=sa.text("status = 'DELIVERED'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_user_restaurant_delivered', table_name='orders')
+    op.drop_constraint('uq_reviews_user_restaurant', 'reviews', type_='unique')
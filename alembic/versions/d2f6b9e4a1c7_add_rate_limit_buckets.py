@@ -0,0 +1,39 @@
+"""Add rate_limit_buckets table
+
+Revision ID: d2f6b9e4a1c7
+Revises: a8c4e2f7d915
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b9e4a1c7'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e2f7d915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Token buckets of the shared rate limiter (rate_limit.PostgresRateLimitBackend).
+    # UNLOGGED: no WAL, and emptied after a crash, which only resets the buckets.
+    op.execute(
+        """
+        CREATE UNLOGGED TABLE rate_limit_buckets (
+            key TEXT PRIMARY KEY,
+            tokens DOUBLE PRECISION NOT NULL,
+            allowed BOOLEAN NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
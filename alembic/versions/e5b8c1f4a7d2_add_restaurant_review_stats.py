@@ -0,0 +1,57 @@
+"""Add restaurant_review_stats table and review listing indexes
+
+Revision ID: e5b8c1f4a7d2
+Revises: c7d2a5e8f134
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8c1f4a7d2'
+down_revision: Union[str, Sequence[str], None] = 'c7d2a5e8f134'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'restaurant_review_stats',
+        sa.Column('restaurant_id', sa.Integer(), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('rating_total', sa.Integer(), nullable=False),
+        sa.Column('stars_1', sa.Integer(), nullable=False),
+        sa.Column('stars_2', sa.Integer(), nullable=False),
+        sa.Column('stars_3', sa.Integer(), nullable=False),
+        sa.Column('stars_4', sa.Integer(), nullable=False),
+        sa.Column('stars_5', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    # Backfill the counters from existing reviews
+    op.execute(
+        """
+        INSERT INTO restaurant_review_stats
+            (restaurant_id, review_count, rating_total, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT restaurant_id, count(*), coalesce(sum(rating), 0),
+               count(*) FILTER (WHERE rating = 1), count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3), count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+        FROM reviews
+        WHERE restaurant_id IS NOT NULL
+        GROUP BY restaurant_id
+        """
+    )
+    op.create_index('ix_reviews_restaurant_created', 'reviews', ['restaurant_id', 'created_at'])
+    op.create_index('ix_reviews_restaurant_rating', 'reviews', ['restaurant_id', 'rating', 'created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_restaurant_rating', table_name='reviews')
+    op.drop_index('ix_reviews_restaurant_created', table_name='reviews')
+    op.drop_table('restaurant_review_stats')
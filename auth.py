@@ -2,27 +2,23 @@
 
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-import os
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from dotenv import load_dotenv
 
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models.users import User,UserRole
 from schemas.users import TokenData, UserResponse
-
-# Load environment variables
-load_dotenv()
+from settings import settings
 
 # Configuration for JWT
-SECRET_KEY = os.getenv("SECRET_KEY") # Change this to a strong secret key
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+SECRET_KEY = settings.secret_key # Change this to a strong secret key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -49,12 +45,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security), 
-    db: Session = Depends(get_db)) -> UserResponse:
+def decode_access_token(token: str) -> TokenData:
     """
-    Dependency to get the current authenticated user from the JWT token.
-    Raises HTTPException if token is invalid or user not found.
+    Validates a JWT access token and returns its claims.
+    Raises HTTPException if the token is invalid or incomplete.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,21 +57,32 @@ async def get_current_user(
     )
     
     try:
-        # Extract token from credentials
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id") # Get user_id from token
         user_role: str = payload.get("role") # Get role from token
         if email is None or user_id is None or user_role is None:
             raise credentials_exception
-        token_data = TokenData(email=email, user_id=user_id, role=UserRole(user_role))
+        return TokenData(email=email, user_id=user_id, role=UserRole(user_role))
     except JWTError:
         raise credentials_exception
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security), 
+    db: Session = Depends(get_db)) -> UserResponse:
+    """
+    Dependency to get the current authenticated user from the JWT token.
+    Raises HTTPException if token is invalid or user not found.
+    """
+    token_data = decode_access_token(credentials.credentials)
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = db.get(User, token_data.user_id)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return UserResponse.from_orm(user)
 
 def get_current_admin_user(current_user: UserResponse = Depends(get_current_user)):
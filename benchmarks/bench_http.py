@@ -0,0 +1,87 @@
+# benchmarks/bench_http.py
+#
+# Load test for a running server: keeps `--concurrency` requests in flight
+# against the public read endpoints for `--duration` seconds and reports
+# throughput and latency percentiles. Compare server profiles with it, e.g.
+#
+#     uvicorn main:app --port 8000                   # single process
+#     WEB_CONCURRENCY=4 gunicorn main:app            # gunicorn.conf.py profile
+#     python -m benchmarks.bench_http --url http://localhost:8000 --concurrency 64 --duration 30
+#
+# Run the client on another machine (or cores the server does not use), and
+# with RATE_LIMIT_ENABLED=false on the server, or it measures the rate limiter.
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+# (weight, path template); {id} is replaced by a random restaurant ID
+ENDPOINTS = [
+    (4, "/restaurants/?limit=20"),
+    (3, "/restaurants/{id}"),
+    (3, "/restaurants/{id}/menu/"),
+    (2, "/reviews/restaurant/{id}"),
+    (2, "/search/?query=a"),
+    (1, "/healthcheckpoint"),
+]
+
+
+async def run_client(client: httpx.AsyncClient, paths, deadline: float, latencies: list, statuses: Counter):
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, concurrency: int, duration: float, warmup: float):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        restaurants = (await client.get("/restaurants/?limit=100&fields=name")).json()
+        restaurant_ids = [restaurant["id"] for restaurant in restaurants] or [1]
+        paths = [
+            template.format(id=random.choice(restaurant_ids))
+            for weight, template in ENDPOINTS
+            for _ in range(weight * 10)
+        ]
+
+        for seconds in (warmup, duration):
+            latencies, statuses = [], Counter()
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                run_client(client, paths, started + seconds, latencies, statuses) for _ in range(concurrency)
+            ])
+            elapsed = time.perf_counter() - started
+        return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the read endpoints of a running server.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    args = parser.parse_args()
+
+    latencies, statuses, elapsed = asyncio.run(run(args.url, args.concurrency, args.duration, args.warmup))
+    latencies_ms = np.array(latencies) * 1000
+    print(f"{args.url}: {args.concurrency} concurrent clients for {elapsed:.1f}s")
+    print(f"  requests/s: {len(latencies) / elapsed:,.0f}")
+    if len(latencies_ms):
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        print(f"  latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {latencies_ms.max():.1f}")
+    print(f"  responses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_queries.py
+#
+# Per-call overhead of the hot primary-key and lookup queries, comparing the
+# legacy `db.query(...).filter(...).first()` form with the Session.get() and
+# lambda_stmt versions now in crud/. Runs against DATABASE_URL, on rows that
+# already exist:
+#
+#     python -m benchmarks.bench_queries --calls 2000
+#
+# "new session" clears the identity map before every call, so every lookup
+# reaches the database; "same session" repeats the lookup in one session,
+# where Session.get() is answered from the identity map.
+
+import argparse
+import time
+
+from sqlalchemy import select
+
+from crud.fevorites import get_favorite
+from crud.menu import get_menu_item
+from crud.orders import get_order
+from crud.restaurants import get_restaurant
+from crud.users import get_user, get_user_by_email
+from database import SessionLocal
+from models import fevorites, menu, orders, restaurants, users
+
+
+def legacy_lookups(row_ids: dict):
+    """The query forms the crud functions used before, keyed like current_lookups."""
+    return {
+        "get_restaurant": lambda db: db.query(restaurants.Restaurant).filter(restaurants.Restaurant.id == row_ids["restaurant"]).first(),
+        "get_menu_item": lambda db: db.query(menu.MenuItem).filter(menu.MenuItem.id == row_ids["menu_item"]).first(),
+        "get_order": lambda db: db.query(orders.Order).filter(orders.Order.id == row_ids["order"]).first(),
+        "get_user": lambda db: db.query(users.User).filter(users.User.id == row_ids["user"]).first(),
+        "get_user_by_email": lambda db: db.query(users.User).filter(users.User.email == row_ids["email"]).first(),
+        "get_favorite": lambda db: db.query(fevorites.Favorite).filter(
+            fevorites.Favorite.user_id == row_ids["favorite"][0],
+            fevorites.Favorite.restaurant_id == row_ids["favorite"][1]
+        ).first(),
+    }
+
+
+def current_lookups(row_ids: dict):
+    return {
+        "get_restaurant": lambda db: get_restaurant(db, row_ids["restaurant"]),
+        "get_menu_item": lambda db: get_menu_item(db, row_ids["menu_item"]),
+        "get_order": lambda db: get_order(db, row_ids["order"]),
+        "get_user": lambda db: get_user(db, row_ids["user"]),
+        "get_user_by_email": lambda db: get_user_by_email(db, row_ids["email"]),
+        "get_favorite": lambda db: get_favorite(db, *row_ids["favorite"]),
+    }
+
+
+def find_row_ids(db) -> dict:
+    """Picks one existing row of each table; lookups whose table is empty are skipped."""
+    favorite = db.execute(select(fevorites.Favorite.user_id, fevorites.Favorite.restaurant_id).limit(1)).first()
+    return {
+        "restaurant": db.scalar(select(restaurants.Restaurant.id).limit(1)),
+        "menu_item": db.scalar(select(menu.MenuItem.id).limit(1)),
+        "order": db.scalar(select(orders.Order.id).limit(1)),
+        "user": db.scalar(select(users.User.id).limit(1)),
+        "email": db.scalar(select(users.User.email).limit(1)),
+        "favorite": tuple(favorite) if favorite else None,
+    }
+
+
+def time_per_call(lookup, calls: int, same_session: bool, repeat: int = 3) -> float:
+    """Returns the best of `repeat` mean seconds per call, after one warm-up call."""
+    db = SessionLocal()
+    try:
+        # The identity map holds objects weakly; keep the first result alive as a request would
+        loaded = lookup(db)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(calls):
+                if not same_session:
+                    db.expunge_all()
+                lookup(db)
+            best = min(best, (time.perf_counter() - started) / calls)
+        return best
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call overhead of the hot crud lookups, legacy vs current.")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        row_ids = find_row_ids(db)
+    finally:
+        db.close()
+    required = {"get_restaurant": "restaurant", "get_menu_item": "menu_item", "get_order": "order",
+                "get_user": "user", "get_user_by_email": "email", "get_favorite": "favorite"}
+
+    legacy, current = legacy_lookups(row_ids), current_lookups(row_ids)
+    print(f"calls={args.calls}, microseconds per call")
+    print(f"{'lookup':<20} {'legacy':>9} {'current':>9} {'speedup':>8}   {'legacy':>9} {'current':>9} {'speedup':>8}")
+    print(f"{'':<20} {'--- new session ---':>37}   {'--- same session ---':>29}")
+    for name, key in required.items():
+        if row_ids[key] is None:
+            print(f"{name:<20} skipped: no rows")
+            continue
+        cells = []
+        for same_session in (False, True):
+            before = time_per_call(legacy[name], args.calls, same_session)
+            after = time_per_call(current[name], args.calls, same_session)
+            cells.append(f"{before * 1e6:9.1f} {after * 1e6:9.1f} {before / after:7.1f}x")
+        print(f"{name:<20} {'   '.join(cells)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_reports.py
+#
+# Compares the vectorized report engine (services/reports.py) against the naive
+# per-row approach of iterating Order objects and their JSON items in Python.
+# Runs on synthetic data, no database required:
+#
+#     python -m benchmarks.bench_reports --orders 200000 --menu-size 60
+
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # services import the models; no connection is made
+
+from services.reports import ReportAccumulator
+
+
+def generate_orders(order_count: int, menu_size: int, seed: int = 7):
+    """Builds synthetic orders shaped like Order rows: (id, hour, items JSON)."""
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(50, 500, menu_size).round(2)
+    orders = []
+    for order_id in range(1, order_count + 1):
+        picked = rng.choice(menu_size, size=rng.integers(1, 6), replace=False)
+        items = [
+            {"menu_item_id": int(i) + 1, "quantity": int(rng.integers(1, 4)), "price_at_order": float(prices[i])}
+            for i in picked
+        ]
+        orders.append((order_id, int(rng.integers(0, 24)), items))
+    return orders
+
+
+def to_line_batches(orders, batch_size: int):
+    """Flattens orders into the numeric rows crud.reports.stream_order_lines yields."""
+    rows = [
+        (order_id, hour, item["menu_item_id"], item["quantity"], item["price_at_order"])
+        for order_id, hour, items in orders
+        for item in items
+    ]
+    return [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+
+def naive_report(orders):
+    """Per-row Python aggregation over orders and their JSON items."""
+    quantity, revenue, item_orders = Counter(), Counter(), Counter()
+    pairs = Counter()
+    hourly_orders, hourly_revenue = defaultdict(int), defaultdict(float)
+    for _, hour, items in orders:
+        hourly_orders[hour] += 1
+        for item in items:
+            line_revenue = item["quantity"] * item["price_at_order"]
+            quantity[item["menu_item_id"]] += item["quantity"]
+            revenue[item["menu_item_id"]] += line_revenue
+            item_orders[item["menu_item_id"]] += 1
+            hourly_revenue[hour] += line_revenue
+        for a, b in combinations(sorted({item["menu_item_id"] for item in items}), 2):
+            pairs[(a, b)] += 1
+    return quantity, revenue, pairs.most_common(10)
+
+
+def vectorized_report(batches):
+    """The report engine fed with the same rows, one NumPy batch at a time."""
+    accumulator = ReportAccumulator()
+    for batch in batches:
+        accumulator.add_batch(np.asarray(batch, dtype=np.float64))
+    accumulator.finish()
+    return accumulator.quantity, accumulator.revenue, accumulator.top_pairs()
+
+
+def best_of(fn, *args, repeat: int = 3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--menu-size", type=int, default=60)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders, args.menu_size)
+    batches = to_line_batches(orders, args.batch_size)
+
+    naive_quantity, naive_revenue, _ = naive_report(orders)
+    quantity, revenue, _ = vectorized_report(batches)
+    assert int(quantity.sum()) == sum(naive_quantity.values())
+    assert abs(revenue.sum() - sum(naive_revenue.values())) < 1e-3 * revenue.sum()
+
+    naive = best_of(naive_report, orders)
+    vectorized = best_of(vectorized_report, batches)
+    print(f"orders={args.orders} menu_size={args.menu_size} batch_size={args.batch_size}")
+    print(f"naive per-row : {naive * 1000:9.1f} ms")
+    print(f"vectorized    : {vectorized * 1000:9.1f} ms  ({naive / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
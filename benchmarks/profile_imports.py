@@ -0,0 +1,51 @@
+# benchmarks/profile_imports.py
+#
+# Import-time profile of the application: imports a module (main by default)
+# in a fresh interpreter with `-X importtime` and lists the packages that
+# take longest, so heavy dependencies creeping onto the startup path of
+# every worker are easy to spot:
+#
+#     python -m benchmarks.profile_imports --top 20
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def profile_imports(module: str):
+    """Returns the total import time of `module` and the self time of each top-level package, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    total = 0
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+        if name.strip() == module:
+            total = int(cumulative_us)
+    return total, by_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the application.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total, by_package = profile_imports(args.module)
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {package:<24} {self_us / 1000:8.1f} ms  ({self_us / total:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# conditional.py
+#
+# Conditional GET support for listings. Each listing derives a weak ETag from
+# the IDs and last change times of the rows it returns, and Last-Modified from
+# the newest of those times. A client revalidating with If-None-Match (or
+# If-Modified-Since) gets an empty 304 while nothing has changed, instead of
+# the whole listing again.
+#
+# Versioned documents that never change once published (menu versions) are
+# served with a strong ETag and an immutable Cache-Control instead, so clients
+# and shared caches keep them without ever revalidating.
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+# Clients may keep responses but must revalidate them before reuse
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
+# Anyone may keep the response, for as long as they like
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def row_version(row) -> Optional[datetime]:
+    """Returns when a row last changed: updated_at, or created_at if it was never updated."""
+    return row.updated_at or row.created_at
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, response: Response, rows: Iterable, *extra) -> Optional[Response]:
+    """
+    Sets ETag, Last-Modified and Cache-Control on `response` from `rows`
+    (objects with id, created_at and updated_at) and any `extra` values that
+    are part of the representation, such as counts. Returns a 304 response to
+    send instead if the client's copy is current, otherwise None.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110;
+    only the ETag notices rows that were removed from the listing.
+    """
+    # The query string selects the representation (fields, include, sort, paging)
+    digest = hashlib.sha1(request.url.query.encode())
+    last_modified = None
+    for row in rows:
+        version = row_version(row)
+        digest.update(f"{type(row).__name__}:{row.id}:{version.isoformat() if version else ''};".encode())
+        if version and (last_modified is None or version > last_modified):
+            last_modified = version
+    digest.update(repr(extra).encode())
+
+    headers = {"ETag": f'W/"{digest.hexdigest()}"', "Cache-Control": CONDITIONAL_CACHE_CONTROL}
+    if last_modified is not None:
+        last_modified = last_modified.astimezone(timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        not_modified = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def immutable_not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Returns a 304 response if the client already holds the immutable document `etag` names, otherwise None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL})
+    return None
+
+
+def immutable_response(etag: str, body: bytes, media_type: str = "application/json") -> Response:
+    """Sends a pre-rendered immutable document as is."""
+    return Response(content=body, media_type=media_type, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL})
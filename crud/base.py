@@ -0,0 +1,20 @@
+# crud/base.py
+#
+# Helpers shared by the CRUD modules, for queries that are the same for
+# every model.
+
+from typing import List
+
+from sqlalchemy.orm import Session
+
+# Largest number of IDs accepted by the batch read endpoints
+MAX_BATCH_IDS = 100
+
+
+def get_by_ids(db: Session, model, ids: List[int]) -> List:
+    """Fetches rows of `model` for a list of IDs in one query, in the order of the IDs given (missing IDs are skipped)."""
+    if not ids:
+        return []
+    found = db.query(model).filter(model.id.in_(set(ids))).all()
+    by_id = {row.id: row for row in found}
+    return [by_id[row_id] for row_id in ids if row_id in by_id]
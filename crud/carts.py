@@ -0,0 +1,43 @@
+# crud/carts.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import carts
+
+# None of these commit: cart changes are committed by the caller, checkout
+# together with the order they turn into.
+
+def get_cart(db: Session, user_id: int, for_update: bool = False) -> Optional[carts.Cart]:
+    """
+    Fetches the user's cart row, expired or not.
+    With for_update the row is locked until the transaction ends; an empty one
+    is created first if needed, so even the first changes to a cart are serialized.
+    """
+    if not for_update:
+        return db.get(carts.Cart, user_id)
+    db.execute(
+        insert(carts.Cart).values(user_id=user_id, items=[], expires_at=func.now())
+        .on_conflict_do_nothing(index_elements=[carts.Cart.user_id])
+    )
+    return db.get(carts.Cart, user_id, with_for_update=True, populate_existing=True)
+
+def upsert_cart(db: Session, user_id: int, restaurant_id: Optional[int], items: List[dict], menu_version: Optional[int], expires_at: datetime):
+    """Inserts or replaces the user's cart."""
+    values = {"restaurant_id": restaurant_id, "items": items, "menu_version": menu_version, "expires_at": expires_at}
+    db.execute(
+        insert(carts.Cart).values(user_id=user_id, **values)
+        .on_conflict_do_update(index_elements=[carts.Cart.user_id], set_={**values, "updated_at": func.now()})
+    )
+
+def delete_cart(db: Session, user_id: int):
+    """Deletes the user's cart, if any."""
+    db.execute(delete(carts.Cart).where(carts.Cart.user_id == user_id))
+
+def delete_expired_carts(db: Session) -> int:
+    """Deletes carts past their expiry. Returns how many were deleted."""
+    return db.execute(delete(carts.Cart).where(carts.Cart.expires_at < func.now())).rowcount
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy import or_, delete, select, tuple_, lambda_stmt
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
 from auth import get_password_hash
 from models import fevorites, menu, restaurants # For hashing passwords
 
@@ -8,32 +10,62 @@ from models import fevorites, menu, restaurants # For hashing passwords
 # --- Favorite CRUD Operations ---
 def get_favorite(db: Session, user_id: int, restaurant_id: int):
     """Checks if a restaurant is favorited by a user."""
-    return db.query(fevorites.Favorite).filter(
+    return db.scalars(lambda_stmt(lambda: select(fevorites.Favorite).where(
         fevorites.Favorite.user_id == user_id,
         fevorites.Favorite.restaurant_id == restaurant_id
-    ).first()
+    ).limit(1))).first()
 
-def get_user_favorites(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Fetches all favorite restaurants for a user."""
-    return db.query(fevorites.Favorite).filter(fevorites.Favorite.user_id == user_id).offset(skip).limit(limit).all()
+def get_user_favorite_restaurants(
+    db: Session,
+    user_id: int,
+    limit: int = 20,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[Tuple[fevorites.Favorite, restaurants.Restaurant]]:
+    """
+    Fetches a user's favorites joined with their restaurants in one query, newest first.
+    Keyset pagination: pass the (created_at, id) of the last favorite of the
+    previous page as `before`.
+    """
+    Favorite = fevorites.Favorite
+    query = db.query(Favorite, restaurants.Restaurant).join(
+        restaurants.Restaurant, restaurants.Restaurant.id == Favorite.restaurant_id
+    ).filter(Favorite.user_id == user_id)
+    if before is not None:
+        query = query.filter(tuple_(Favorite.created_at, Favorite.id) < tuple_(*before))
+    return [tuple(row) for row in query.order_by(Favorite.created_at.desc(), Favorite.id.desc()).limit(limit).all()]
 
-def add_favorite(db: Session, user_id: int, restaurant_id: int):
-    """Adds a restaurant to user's favorites."""
-    db_favorite = fevorites.Favorite(user_id=user_id, restaurant_id=restaurant_id)
-    db.add(db_favorite)
-    db.commit()
-    db.refresh(db_favorite)
-    return db_favorite
+def get_favorite_restaurant_ids(db: Session, user_id: int) -> Set[int]:
+    """Fetches the IDs of every restaurant a user has favorited."""
+    return set(db.scalars(
+        select(fevorites.Favorite.restaurant_id).where(fevorites.Favorite.user_id == user_id)
+    ))
 
-def remove_favorite(db: Session, user_id: int, restaurant_id: int):
-    """Removes a restaurant from user's favorites."""
-    db_favorite = db.query(fevorites.Favorite).filter(
-        fevorites.Favorite.user_id == user_id,
-        fevorites.Favorite.restaurant_id == restaurant_id
+def toggle_favorite(db: Session, user_id: int, restaurant_id: int) -> Tuple[fevorites.Favorite, bool]:
+    """
+    Removes the favorite if it exists, otherwise adds it, without a read first.
+    DELETE ... RETURNING tells whether a row existed; if not, INSERT ... ON CONFLICT
+    DO NOTHING adds it, so a concurrent double tap cannot create a duplicate.
+    Returns the favorite row and whether the restaurant is now favorited.
+    Raises IntegrityError if the restaurant does not exist.
+    """
+    Favorite = fevorites.Favorite
+    removed = db.scalars(
+        delete(Favorite)
+        .where(Favorite.user_id == user_id, Favorite.restaurant_id == restaurant_id)
+        .returning(Favorite)
     ).first()
-    if db_favorite:
-        db.delete(db_favorite)
+    if removed is not None:
         db.commit()
-        return True
-    return False
+        return removed, False
 
+    added = db.scalars(
+        insert(Favorite)
+        .values(user_id=user_id, restaurant_id=restaurant_id)
+        .on_conflict_do_nothing(constraint="uq_favorites_user_restaurant")
+        .returning(Favorite)
+    ).first()
+    db.commit()
+    if added is None:
+        # A concurrent request added it between our DELETE and INSERT
+        return get_favorite(db, user_id=user_id, restaurant_id=restaurant_id), True
+    return added, True
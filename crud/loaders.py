@@ -0,0 +1,50 @@
+# crud/loaders.py
+#
+# DataLoader-style batching for routers that build lists of objects with
+# related objects. Relationships on the models raise instead of lazy loading
+# (lazy="raise_on_sql"), so a router that needs, say, the menu of every
+# restaurant on a page asks a loader for all of them: the keys are fetched in
+# one query and the results cached for the rest of the request.
+
+from typing import Callable, Dict, Hashable, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from crud.menu import get_menu_items_by_restaurant_ids
+from crud.restaurants import get_latest_reviews_by_restaurant
+
+
+class BatchLoader:
+    """
+    Loads the values of many keys with one call of `batch_fn(keys) -> {key: value}`.
+    Keys already loaded are served from the cache; keys `batch_fn` does not
+    return get `default_factory()`.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Dict], default_factory: Callable = lambda: None):
+        self.batch_fn = batch_fn
+        self.default_factory = default_factory
+        self._cache: Dict = {}
+
+    def load_many(self, keys: Iterable[Hashable]) -> List:
+        """Returns the values of `keys`, in order, fetching the ones not cached in a single batch."""
+        keys = list(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in self._cache]
+        if missing:
+            found = self.batch_fn(missing)
+            for key in missing:
+                self._cache[key] = found[key] if key in found else self.default_factory()
+        return [self._cache[key] for key in keys]
+
+    def load(self, key: Hashable):
+        return self.load_many([key])[0]
+
+
+class RequestLoaders:
+    """The loaders of one request, sharing its session."""
+
+    def __init__(self, db: Session, reviews_per_restaurant: int = 10):
+        self.menu_items_by_restaurant = BatchLoader(lambda ids: get_menu_items_by_restaurant_ids(db, ids), list)
+        self.latest_reviews_by_restaurant = BatchLoader(
+            lambda ids: get_latest_reviews_by_restaurant(db, ids, per_restaurant=reviews_per_restaurant), list
+        )
@@ -1,21 +1,77 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy import or_, update, delete, select, exists, func
+from typing import Dict, List, Optional
 from auth import get_password_hash
-from models import menu # For hashing passwords
-from schemas.menu import MenuItemCreate, MenuItemUpdate
+from models import menu, restaurants, orders, carts # For hashing passwords
+from schemas.menu import MenuItemCreate, MenuItemUpdate, MenuItemResponse, MenuVersionResponse
 
 # --- MenuItem CRUD Operations ---
 def get_menu_items_by_restaurant(db: Session, restaurant_id: int, skip: int = 0, limit: int = 100):
     """Fetches menu items for a specific restaurant."""
     return db.query(menu.MenuItem).filter(menu.MenuItem.restaurant_id == restaurant_id).offset(skip).limit(limit).all()
 
+def get_menu_items_by_restaurant_ids(db: Session, restaurant_ids: List[int]) -> Dict[int, list]:
+    """Fetches the menu items of several restaurants in one query, grouped by restaurant ID."""
+    if not restaurant_ids:
+        return {}
+    grouped = {restaurant_id: [] for restaurant_id in restaurant_ids}
+    items = db.query(menu.MenuItem).filter(menu.MenuItem.restaurant_id.in_(set(restaurant_ids))).order_by(menu.MenuItem.id).all()
+    for item in items:
+        grouped[item.restaurant_id].append(item)
+    return grouped
+
 def get_menu_item(db: Session, item_id: int):
-    """Fetches a menu item by its ID."""
-    return db.query(menu.MenuItem).filter(menu.MenuItem.id == item_id).first()
+    """Fetches a menu item by its ID, from the session's identity map if already loaded."""
+    return db.get(menu.MenuItem, item_id)
+
+def get_menu_version(db: Session, restaurant_id: int, version: int):
+    """Fetches a published menu version of a restaurant."""
+    return db.query(menu.MenuVersion).filter(
+        menu.MenuVersion.restaurant_id == restaurant_id,
+        menu.MenuVersion.version == version
+    ).first()
+
+def publish_menu_version(db: Session, restaurant_id: int) -> int:
+    """
+    Publishes the restaurant's menu items as its next menu version, in the
+    session's transaction, without committing. Bumping restaurants.menu_version
+    locks the restaurant's row, so concurrent publishes get consecutive versions.
+    Returns the new version.
+    """
+    version = db.scalar(
+        update(restaurants.Restaurant).where(restaurants.Restaurant.id == restaurant_id)
+        .values(menu_version=restaurants.Restaurant.menu_version + 1)
+        .returning(restaurants.Restaurant.menu_version)
+    )
+    items = db.query(menu.MenuItem).filter(menu.MenuItem.restaurant_id == restaurant_id).order_by(menu.MenuItem.id).all()
+    body = MenuVersionResponse(
+        restaurant_id=restaurant_id,
+        version=version,
+        items=[MenuItemResponse.model_validate(item) for item in items]
+    ).model_dump_json()
+    db.add(menu.MenuVersion(restaurant_id=restaurant_id, version=version, body=body))
+    return version
+
+def delete_unreferenced_menu_versions(db: Session, keep_latest: int) -> int:
+    """
+    Deletes the menu versions that are not among the `keep_latest` newest of
+    their restaurant (so the current one always stays) and that no order or
+    cart was priced from. Returns the number of versions deleted, without committing.
+    """
+    MenuVersion = menu.MenuVersion
+    recency = select(
+        MenuVersion.id,
+        func.row_number().over(partition_by=MenuVersion.restaurant_id, order_by=MenuVersion.version.desc()).label("recency")
+    ).subquery()
+    result = db.execute(delete(MenuVersion).where(
+        MenuVersion.id.in_(select(recency.c.id).where(recency.c.recency > max(keep_latest, 1))),
+        ~exists().where(orders.Order.restaurant_id == MenuVersion.restaurant_id, orders.Order.menu_version == MenuVersion.version),
+        ~exists().where(carts.Cart.restaurant_id == MenuVersion.restaurant_id, carts.Cart.menu_version == MenuVersion.version)
+    ).execution_options(synchronize_session=False))
+    return result.rowcount
 
 def create_menu_item(db: Session, menu_item: MenuItemCreate, restaurant_id: int):
-    """Creates a new menu item for a given restaurant."""
+    """Creates a new menu item for a given restaurant and publishes the new menu version."""
     db_menu_item = menu.MenuItem(
         restaurant_id=restaurant_id,
         name=menu_item.name,
@@ -25,30 +81,30 @@ def create_menu_item(db: Session, menu_item: MenuItemCreate, restaurant_id: int)
         category=menu_item.category
     )
     db.add(db_menu_item)
+    db.flush()
+    publish_menu_version(db, restaurant_id)
     db.commit()
-    db.refresh(db_menu_item)
     return db_menu_item
 
 def update_menu_item(db: Session, item_id: int, menu_item_update: MenuItemUpdate):
-    """Updates an existing menu item."""
-    db_menu_item = db.query(menu.MenuItem).filter(menu.MenuItem.id == item_id).first()
-    if not db_menu_item:
-        return None
-    
+    """Updates an existing menu item with a single UPDATE ... RETURNING and publishes the new menu version."""
     update_data = menu_item_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_menu_item, key, value)
+    if not update_data:
+        return db.get(menu.MenuItem, item_id)
     
-    db.add(db_menu_item)
+    db_menu_item = db.scalars(
+        update(menu.MenuItem).where(menu.MenuItem.id == item_id).values(**update_data).returning(menu.MenuItem),
+        execution_options={"populate_existing": True}
+    ).first()
+    if db_menu_item is not None and db_menu_item.restaurant_id is not None:
+        publish_menu_version(db, db_menu_item.restaurant_id)
     db.commit()
-    db.refresh(db_menu_item)
     return db_menu_item
 
 def delete_menu_item(db: Session, item_id: int):
-    """Deletes a menu item."""
-    db_menu_item = db.query(menu.MenuItem).filter(menu.MenuItem.id == item_id).first()
-    if db_menu_item:
-        db.delete(db_menu_item)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+    """Deletes a menu item with a single DELETE ... RETURNING and publishes the new menu version."""
+    deleted = db.execute(delete(menu.MenuItem).where(menu.MenuItem.id == item_id).returning(menu.MenuItem.restaurant_id)).first()
+    if deleted is not None and deleted.restaurant_id is not None:
+        publish_menu_version(db, deleted.restaurant_id)
+    db.commit()
+    return deleted is not None
\ No newline at end of file
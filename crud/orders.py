@@ -1,74 +1,103 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, update
 from typing import List, Optional
 from models import orders 
-from models import menu
+from models import restaurants
 from schemas.orders import OrderCreate
+from services.events import queue_order_event, order_status_event
+from services.menu_versions import get_current_menu_snapshot
+from crud.outbox import add_outbox_event
 
 # --- Order CRUD Operations ---
 def get_order(db: Session, order_id: int):
-    """Fetches an order by ID."""
-    return db.query(orders.Order).filter(orders.Order.id == order_id).first()
+    """Fetches an order by ID, from the session's identity map if already loaded."""
+    return db.get(orders.Order, order_id)
 
 def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Fetches all orders for a specific user."""
-    return db.query(orders.Order).filter(orders.Order.user_id == user_id).offset(skip).limit(limit).all()
+    """Fetches all orders for a specific user, newest first."""
+    # Newest first lets Postgres read the (user_id, created_at) index of each partition and stop at the limit
+    return db.query(orders.Order).filter(orders.Order.user_id == user_id).order_by(
+        orders.Order.created_at.desc(), orders.Order.id.desc()
+    ).offset(skip).limit(limit).all()
 
 def get_all_orders(db: Session, skip: int = 0, limit: int = 100):
-    """Fetches all orders (admin view)."""
-    return db.query(orders.Order).offset(skip).limit(limit).all()
+    """Fetches all orders (admin view), newest first."""
+    return db.query(orders.Order).order_by(orders.Order.created_at.desc(), orders.Order.id.desc()).offset(skip).limit(limit).all()
 
 def create_order(db: Session, order: OrderCreate, user_id: int):
-    """Creates a new order."""
-    # Validate menu items and calculate total price
+    """Creates a new order, priced from the restaurant's current menu version."""
+    restaurant = db.get(restaurants.Restaurant, order.restaurant_id)
+    if restaurant is None:
+        raise ValueError(f"Restaurant with ID {order.restaurant_id} not found.")
+    # Validate menu items and calculate total price against the published
+    # menu, which is cached per worker, so no menu rows are loaded
+    menu_snapshot = get_current_menu_snapshot(db, restaurant)
     total_price = 0.0
     processed_items = []
-    
-    # Fetch all menu items for the restaurant in one go to minimize DB queries
-    restaurant_menu_items = db.query(menu.MenuItem).filter(
-        menu.MenuItem.restaurant_id == order.restaurant_id
-    ).all()
-    menu_item_map = {item.id: item for item in restaurant_menu_items}
 
     for item_data in order.items:
-        menu_item = menu_item_map.get(item_data.menu_item_id)
-        if not menu_item or not menu_item.is_available:
+        menu_item = menu_snapshot.items.get(item_data.menu_item_id)
+        if not menu_item or not menu_item["is_available"]:
             raise ValueError(f"Menu item with ID {item_data.menu_item_id} not found or not available in this restaurant.")
-        total_price += menu_item.price * item_data.quantity
-        processed_items.append({"menu_item_id": item_data.menu_item_id, "quantity": item_data.quantity, "price_at_order": menu_item.price})
+        total_price += menu_item["price"] * item_data.quantity
+        processed_items.append({"menu_item_id": item_data.menu_item_id, "quantity": item_data.quantity, "price_at_order": menu_item["price"]})
 
+    return _insert_order(db, user_id, order.restaurant_id, processed_items, total_price, restaurant.menu_version)
+
+def create_order_from_cart(db: Session, user_id: int, restaurant_id: int, cart_items: List[dict], menu_version: int):
+    """Creates an order from cart lines already validated and priced at `menu_version` by services/cart.py."""
+    processed_items = [
+        {"menu_item_id": line["menu_item_id"], "quantity": line["quantity"], "price_at_order": line["unit_price"]}
+        for line in cart_items
+    ]
+    total_price = sum(item["price_at_order"] * item["quantity"] for item in processed_items)
+    return _insert_order(db, user_id, restaurant_id, processed_items, total_price, menu_version)
+
+def _insert_order(db: Session, user_id: int, restaurant_id: int, processed_items: List[dict], total_price: float, menu_version: int):
+    """Inserts a pending order and its order.created outbox event, and commits."""
     db_order = orders.Order(
         user_id=user_id,
-        restaurant_id=order.restaurant_id,
+        restaurant_id=restaurant_id,
         items=processed_items,
         total_price=total_price,
+        menu_version=menu_version,
         status=orders.OrderStatus.PENDING
     )
     db.add(db_order)
+    db.flush() # Assigns the order ID for the outbox event, in the same transaction
+    add_outbox_event(db, "order.created", db_order.id, {**order_status_event(db_order), "total_price": total_price})
     db.commit()
-    db.refresh(db_order)
     return db_order
 
-def cancel_order(db: Session, order_id: int):
-    """Cancels an order if it's in pending status."""
-    db_order = db.query(orders.Order).filter(orders.Order.id == order_id).first()
-    if not db_order:
-        return None
-    if db_order.status == orders.OrderStatus.PENDING:
-        db_order.status = orders.OrderStatus.CANCELLED
-        db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
-        return db_order
-    return None # Order cannot be cancelled
+def transition_order_status(db: Session, order_id: int, new_status: orders.OrderStatus, user_id: Optional[int] = None):
+    """
+    Moves an order to a new status if the state machine allows it from the
+    current one, as a single conditional UPDATE ... RETURNING, so two concurrent
+    transitions of the same order cannot both succeed.
+    If user_id is given, only that user's order is updated.
+    Returns the updated order, or None if nothing matched.
+    """
+    allowed_from = [status for status, targets in orders.ORDER_STATUS_TRANSITIONS.items() if new_status in targets]
+    stmt = update(orders.Order).where(
+        orders.Order.id == order_id,
+        orders.Order.status.in_(allowed_from)
+    ).values(status=new_status).returning(orders.Order)
+    if user_id is not None:
+        stmt = stmt.where(orders.Order.user_id == user_id)
 
-def update_order_status(db: Session, order_id: int, new_status: orders.OrderStatus):
-    """Updates the status of an order (typically by admin)."""
-    db_order = db.query(orders.Order).filter(orders.Order.id == order_id).first()
+    db_order = db.scalars(stmt, execution_options={"populate_existing": True}).first()
     if not db_order:
+        db.rollback()
         return None
-    db_order.status = new_status
-    db.add(db_order)
+    queue_order_event(db, db_order)
+    add_outbox_event(db, "order.status_changed", db_order.id, order_status_event(db_order))
     db.commit()
-    db.refresh(db_order)
     return db_order
+
+def cancel_order(db: Session, order_id: int, user_id: Optional[int] = None):
+    """Cancels an order if it's in pending status (and belongs to user_id, if given)."""
+    return transition_order_status(db, order_id, orders.OrderStatus.CANCELLED, user_id=user_id)
+
+def update_order_status(db: Session, order_id: int, new_status: orders.OrderStatus):
+    """Updates the status of an order (typically by admin) along an allowed transition."""
+    return transition_order_status(db, order_id, new_status)
@@ -0,0 +1,44 @@
+# crud/outbox.py
+
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import outbox
+
+
+def add_outbox_event(db: Session, event_type: str, aggregate_id: int, payload: dict):
+    """
+    Records an event in the session's current transaction. Does not commit:
+    the event becomes visible to the dispatcher together with the write it describes.
+    """
+    db_event = outbox.OutboxEvent(event_type=event_type, aggregate_id=aggregate_id, payload=payload)
+    db.add(db_event)
+    return db_event
+
+def claim_outbox_events(db: Session, batch_size: int = 100) -> List[outbox.OutboxEvent]:
+    """
+    Locks the next batch of due events for this transaction.
+    Rows locked by other dispatchers are skipped, so several can run at once.
+    """
+    return db.query(outbox.OutboxEvent).filter(
+        outbox.OutboxEvent.status == outbox.OutboxStatus.PENDING,
+        outbox.OutboxEvent.available_at <= func.now()
+    ).order_by(outbox.OutboxEvent.available_at, outbox.OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+def mark_outbox_event_processed(db_event: outbox.OutboxEvent):
+    """Marks a claimed event as delivered."""
+    db_event.status = outbox.OutboxStatus.PROCESSED
+    db_event.processed_at = datetime.now(timezone.utc)
+    db_event.attempts += 1
+
+def mark_outbox_event_failed(db_event: outbox.OutboxEvent, error: str, max_attempts: int, retry_delay: timedelta):
+    """Schedules a claimed event for retry, or gives up on it after max_attempts."""
+    db_event.attempts += 1
+    db_event.last_error = error[:1000]
+    if db_event.attempts >= max_attempts:
+        db_event.status = outbox.OutboxStatus.FAILED
+    else:
+        db_event.available_at = datetime.now(timezone.utc) + retry_delay
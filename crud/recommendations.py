@@ -0,0 +1,67 @@
+# crud/recommendations.py
+
+from typing import List, Tuple
+
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+from models import fevorites, orders, recommendations, restaurants
+
+
+def get_favorite_interactions(db: Session) -> List[Tuple[int, int]]:
+    """Fetches every (user_id, restaurant_id) favorite pair."""
+    return db.query(fevorites.Favorite.user_id, fevorites.Favorite.restaurant_id).distinct().all()
+
+def get_delivered_order_interactions(db: Session) -> List[Tuple[int, int, int]]:
+    """Fetches (user_id, restaurant_id, delivered_order_count) for every user who received an order."""
+    return db.query(
+        orders.Order.user_id, orders.Order.restaurant_id, func.count(orders.Order.id)
+    ).filter(
+        orders.Order.status == orders.OrderStatus.DELIVERED
+    ).group_by(orders.Order.user_id, orders.Order.restaurant_id).all()
+
+def replace_restaurant_similarities(db: Session, similarities: List[dict]):
+    """Atomically replaces the whole similarity table with a freshly computed one."""
+    db.query(recommendations.RestaurantSimilarity).delete(synchronize_session=False)
+    if similarities:
+        db.bulk_insert_mappings(recommendations.RestaurantSimilarity, similarities)
+    db.commit()
+
+def get_similar_restaurants(db: Session, restaurant_id: int, limit: int = 10):
+    """Fetches (restaurant, score) for the active restaurants most similar to the given one."""
+    similarity = recommendations.RestaurantSimilarity
+    return db.execute(
+        select(restaurants.Restaurant, similarity.score)
+        .join(similarity, similarity.similar_restaurant_id == restaurants.Restaurant.id)
+        .where(similarity.restaurant_id == restaurant_id, restaurants.Restaurant.is_active == True)
+        .order_by(similarity.rank)
+        .limit(limit)
+    ).all()
+
+def get_user_recommendations(db: Session, user_id: int, limit: int = 10):
+    """
+    Fetches (restaurant, score) recommendations for a user in a single query:
+    neighbours of every restaurant the user favorited or received an order from,
+    scored by summed similarity, excluding restaurants the user already knows.
+    """
+    similarity = recommendations.RestaurantSimilarity
+    known = union(
+        select(fevorites.Favorite.restaurant_id).where(fevorites.Favorite.user_id == user_id),
+        select(orders.Order.restaurant_id).where(
+            orders.Order.user_id == user_id,
+            orders.Order.status == orders.OrderStatus.DELIVERED
+        )
+    ).subquery()
+    score = func.sum(similarity.score).label("score")
+    return db.execute(
+        select(restaurants.Restaurant, score)
+        .join(similarity, similarity.similar_restaurant_id == restaurants.Restaurant.id)
+        .where(
+            similarity.restaurant_id.in_(select(known.c.restaurant_id)),
+            similarity.similar_restaurant_id.not_in(select(known.c.restaurant_id)),
+            restaurants.Restaurant.is_active == True
+        )
+        .group_by(restaurants.Restaurant.id)
+        .order_by(score.desc())
+        .limit(limit)
+    ).all()
@@ -0,0 +1,56 @@
+# crud/reports.py
+
+from datetime import datetime
+from typing import Iterator, List, Sequence
+
+from sqlalchemy import Integer, Float, cast, extract, func, select, true
+from sqlalchemy.orm import Session
+
+from models import menu, orders
+
+# Number of order line rows fetched per round trip when streaming report data
+REPORT_BATCH_SIZE = 5000
+
+
+def stream_order_lines(
+    db: Session,
+    restaurant_id: int,
+    since: datetime,
+    batch_size: int = REPORT_BATCH_SIZE
+) -> Iterator[Sequence]:
+    """
+    Streams the line items of a restaurant's non-cancelled orders in batches.
+
+    The JSON items column is flattened by Postgres (json_array_elements), so every
+    row is purely numeric: (order_id, hour_of_day, menu_item_id, quantity, price_at_order).
+    Rows are ordered by order ID so all lines of an order are contiguous.
+    """
+    line = func.json_array_elements(orders.Order.items).table_valued("value").lateral("line")
+    stmt = (
+        select(
+            orders.Order.id,
+            # In UTC, whatever the session's TimeZone setting
+            cast(extract("hour", func.timezone("UTC", orders.Order.created_at)), Integer),
+            cast(line.c.value.op("->>")("menu_item_id"), Integer),
+            cast(line.c.value.op("->>")("quantity"), Integer),
+            cast(line.c.value.op("->>")("price_at_order"), Float),
+        )
+        .select_from(orders.Order)
+        .join(line, true())
+        .where(
+            orders.Order.restaurant_id == restaurant_id,
+            orders.Order.created_at >= since,
+            orders.Order.status != orders.OrderStatus.CANCELLED
+        )
+        .order_by(orders.Order.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(stmt).partitions()
+
+
+def get_menu_item_names(db: Session, item_ids: List[int]):
+    """Fetches {menu_item_id: name} for the given menu item IDs in one query."""
+    if not item_ids:
+        return {}
+    rows = db.query(menu.MenuItem.id, menu.MenuItem.name).filter(menu.MenuItem.id.in_(item_ids)).all()
+    return {item_id: name for item_id, name in rows}
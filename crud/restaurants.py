@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
-from models import restaurants 
+from sqlalchemy.orm import Session, load_only, aliased
+from sqlalchemy import or_, func, extract, update, select, union_all, literal, null
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from models import restaurants, orders, fevorites, reviews
 from schemas.restaurants import RestaurantCreate, RestaurantUpdate
 
 # --- Restaurant CRUD Operations ---
@@ -10,8 +11,97 @@ def get_restaurants(db: Session, skip: int = 0, limit: int = 100):
     return db.query(restaurants.Restaurant).offset(skip).limit(limit).all()
 
 def get_restaurant(db: Session, restaurant_id: int):
-    """Fetches a restaurant by its ID."""
-    return db.query(restaurants.Restaurant).filter(restaurants.Restaurant.id == restaurant_id).first()
+    """Fetches a restaurant by its ID, from the session's identity map if already loaded."""
+    return db.get(restaurants.Restaurant, restaurant_id)
+
+def get_restaurants_with_relations(
+    db: Session,
+    restaurant_ids: Optional[List[int]] = None,
+    skip: int = 0,
+    limit: int = 100,
+    columns: Optional[Sequence[str]] = None,
+    include_favorite_count: bool = False
+):
+    """
+    Fetches restaurants loading exactly what the caller needs, in one query.
+    Related menus and reviews are loaded in batches through crud.loaders.
+    - columns: restaurant columns to load (the ID is always loaded); all if None.
+    - restaurant_ids: fetch these restaurants, in this order, instead of a page.
+    Returns a list of (restaurant, favorite_count) where favorite_count is None unless requested.
+    """
+    Restaurant = restaurants.Restaurant
+    entities = [Restaurant]
+    if include_favorite_count:
+        entities.append(
+            select(func.count(fevorites.Favorite.id))
+            .where(fevorites.Favorite.restaurant_id == Restaurant.id)
+            .scalar_subquery()
+        )
+    query = db.query(*entities)
+    if columns is not None:
+        query = query.options(load_only(Restaurant.id, *[getattr(Restaurant, column) for column in columns]))
+
+    if restaurant_ids is None:
+        rows = query.offset(skip).limit(limit).all()
+    else:
+        if not restaurant_ids:
+            return []
+        rows = query.filter(Restaurant.id.in_(set(restaurant_ids))).all()
+    # A single-entity query returns bare restaurants rather than rows
+    rows = [tuple(row) if include_favorite_count else (row, None) for row in rows]
+    if restaurant_ids is not None:
+        by_id = {row[0].id: row for row in rows}
+        rows = [by_id[restaurant_id] for restaurant_id in restaurant_ids if restaurant_id in by_id]
+    return rows
+
+def get_latest_reviews_by_restaurant(db: Session, restaurant_ids: List[int], per_restaurant: int = 10) -> Dict[int, list]:
+    """Fetches the latest reviews of several restaurants in one query, grouped by restaurant ID."""
+    if not restaurant_ids:
+        return {}
+    ranked = select(
+        reviews.Review,
+        func.row_number().over(
+            partition_by=reviews.Review.restaurant_id,
+            order_by=(reviews.Review.created_at.desc(), reviews.Review.id.desc())
+        ).label("position")
+    ).where(reviews.Review.restaurant_id.in_(set(restaurant_ids))).subquery()
+    latest = aliased(reviews.Review, ranked)
+    rows = db.query(latest).filter(ranked.c.position <= per_restaurant).order_by(latest.restaurant_id, ranked.c.position).all()
+
+    grouped = {restaurant_id: [] for restaurant_id in restaurant_ids}
+    for review in rows:
+        grouped[review.restaurant_id].append(review)
+    return grouped
+
+def get_restaurant_activity(db: Session, since: datetime, landmark: float, decay: float) -> Tuple[List[Tuple[int, float, float]], float]:
+    """
+    Sums exponentially weighted orders and favorites per restaurant since a point in time.
+    Each event contributes exp(decay * (event_epoch - landmark)).
+    Both sums are read in one statement, so from one snapshot, together with
+    the statement's start time (epoch, database clock): events created later
+    cannot be included.
+    Returns (a list of (restaurant_id, orders_score, favorites_score), snapshot_epoch).
+    """
+    def decayed_counts(model, kind: str):
+        weight = func.exp(decay * (extract("epoch", model.created_at) - landmark))
+        return (
+            select(model.restaurant_id, literal(kind), func.sum(weight))
+            .where(model.created_at >= since)
+            .group_by(model.restaurant_id)
+        )
+
+    rows = db.execute(union_all(
+        decayed_counts(orders.Order, "orders"),
+        decayed_counts(fevorites.Favorite, "favorites"),
+        select(null(), literal("snapshot"), extract("epoch", func.statement_timestamp()))
+    )).all()
+    order_scores = {restaurant_id: score for restaurant_id, kind, score in rows if kind == "orders"}
+    favorite_scores = {restaurant_id: score for restaurant_id, kind, score in rows if kind == "favorites"}
+    snapshot_at = next(float(score) for _, kind, score in rows if kind == "snapshot")
+    return [
+        (restaurant_id, float(order_scores.get(restaurant_id, 0.0)), float(favorite_scores.get(restaurant_id, 0.0)))
+        for restaurant_id in order_scores.keys() | favorite_scores.keys()
+    ], snapshot_at
 
 def create_restaurant(db: Session, restaurant: RestaurantCreate):
     """Creates a new restaurant."""
@@ -25,27 +115,24 @@ def create_restaurant(db: Session, restaurant: RestaurantCreate):
     )
     db.add(db_restaurant)
     db.commit()
-    db.refresh(db_restaurant)
     return db_restaurant
 
 def update_restaurant(db: Session, restaurant_id: int, restaurant_update: RestaurantUpdate):
-    """Updates an existing restaurant's information."""
-    db_restaurant = db.query(restaurants.Restaurant).filter(restaurants.Restaurant.id == restaurant_id).first()
-    if not db_restaurant:
-        return None
-    
+    """Updates an existing restaurant's information with a single UPDATE ... RETURNING."""
     update_data = restaurant_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_restaurant, key, value)
+    if not update_data:
+        return db.get(restaurants.Restaurant, restaurant_id)
     
-    db.add(db_restaurant)
+    db_restaurant = db.scalars(
+        update(restaurants.Restaurant).where(restaurants.Restaurant.id == restaurant_id).values(**update_data).returning(restaurants.Restaurant),
+        execution_options={"populate_existing": True}
+    ).first()
     db.commit()
-    db.refresh(db_restaurant)
     return db_restaurant
 
 def delete_restaurant(db: Session, restaurant_id: int):
     """Deletes a restaurant from the database."""
-    db_restaurant = db.query(restaurants.Restaurant).filter(restaurants.Restaurant.id == restaurant_id).first()
+    db_restaurant = db.get(restaurants.Restaurant, restaurant_id)
     if db_restaurant:
         db.delete(db_restaurant)
         db.commit()
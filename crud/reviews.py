@@ -1,56 +1,146 @@
+import math
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy import or_, update, delete, select, exists, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Tuple
 from auth import get_password_hash
-from models import reviews # For hashing passwords
-from schemas.reviews import ReviewCreate, ReviewUpdate
+from models import reviews, orders # For hashing passwords
+from schemas.reviews import ReviewCreate, ReviewUpdate, ReviewSort
+
+# Listing orders; the id breaks ties so pages are stable
+REVIEW_SORT_ORDER = {
+    ReviewSort.RECENT: (reviews.Review.created_at.desc(), reviews.Review.id.desc()),
+    ReviewSort.HIGHEST: (reviews.Review.rating.desc(), reviews.Review.created_at.desc(), reviews.Review.id.desc()),
+    ReviewSort.LOWEST: (reviews.Review.rating.asc(), reviews.Review.created_at.desc(), reviews.Review.id.desc()),
+}
+
+def _stars(rating: float) -> int:
+    """Whole stars as stored in the integer rating column (Postgres rounds halves up)."""
+    return int(math.floor(rating + 0.5))
+
+def _apply_review_stats(db: Session, restaurant_id: int, added: Optional[int] = None, removed: Optional[int] = None):
+    """
+    Adjusts the restaurant's review counters for one review added and/or
+    removed (an edit is both) with a single upsert, in the caller's transaction.
+    """
+    Stats = reviews.RestaurantReviewStats
+    deltas = {
+        "review_count": (added is not None) - (removed is not None),
+        "rating_total": (added or 0) - (removed or 0),
+    }
+    for stars in range(1, 6):
+        deltas[f"stars_{stars}"] = (added == stars) - (removed == stars)
+    statement = insert(Stats).values(restaurant_id=restaurant_id, **deltas)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[Stats.restaurant_id],
+        set_={
+            **{column: getattr(Stats, column) + delta for column, delta in deltas.items() if delta},
+            "updated_at": func.now(),
+        }
+    ))
 
 # --- Review CRUD Operations ---
 def get_review(db: Session, review_id: int):
     """Fetches a review by ID."""
     return db.query(reviews.Review).filter(reviews.Review.id == review_id).first()
 
-def get_reviews_by_restaurant(db: Session, restaurant_id: int, skip: int = 0, limit: int = 100):
-    """Fetches all reviews for a specific restaurant."""
-    return db.query(reviews.Review).filter(reviews.Review.restaurant_id == restaurant_id).offset(skip).limit(limit).all()
+def get_reviews_by_restaurant(db: Session, restaurant_id: int, skip: int = 0, limit: int = 100, sort: ReviewSort = ReviewSort.RECENT):
+    """Fetches all reviews for a specific restaurant, newest or best/worst rated first."""
+    return db.query(reviews.Review).filter(reviews.Review.restaurant_id == restaurant_id).order_by(
+        *REVIEW_SORT_ORDER[sort]
+    ).offset(skip).limit(limit).all()
+
+def get_review_stats(db: Session, restaurant_id: int):
+    """Fetches the review counters of a restaurant, or None if it was never reviewed."""
+    return db.get(reviews.RestaurantReviewStats, restaurant_id)
+
+def count_recent_reviews(db: Session, restaurant_id: int, days: int) -> int:
+    """Counts a restaurant's reviews from the last `days` days."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return db.scalar(
+        select(func.count()).select_from(reviews.Review).where(
+            reviews.Review.restaurant_id == restaurant_id,
+            reviews.Review.created_at >= since
+        )
+    )
+
+def get_review_eligibility(db: Session, user_id: int, restaurant_id: int) -> Tuple[bool, bool]:
+    """
+    Checks in one query whether the user has a delivered order from the
+    restaurant and whether they already reviewed it.
+    Returns (has_delivered_order, has_reviewed).
+    """
+    has_delivered_order = exists().where(
+        orders.Order.user_id == user_id,
+        orders.Order.restaurant_id == restaurant_id,
+        orders.Order.status == orders.OrderStatus.DELIVERED
+    )
+    has_reviewed = exists().where(
+        reviews.Review.user_id == user_id,
+        reviews.Review.restaurant_id == restaurant_id
+    )
+    return tuple(db.execute(select(has_delivered_order, has_reviewed)).one())
 
 def create_review(db: Session, review: ReviewCreate, user_id: int):
-    """Adds a new review for a restaurant."""
-    # Ensure order is completed for review (bonus requirement)
-    # This check would ideally involve finding a completed order by the user for this restaurant
-    # For simplicity, we skip this check here, but it should be added in the router.
-    
+    """
+    Adds a new review for a restaurant. Eligibility is checked by the caller
+    (see get_review_eligibility); raises IntegrityError if the user already
+    reviewed the restaurant.
+    """
     db_review = reviews.Review(
         user_id=user_id,
         restaurant_id=review.restaurant_id,
-        rating=review.rating,
+        rating=_stars(review.rating),
         comment=review.comment
     )
     db.add(db_review)
+    db.flush()
+    _apply_review_stats(db, review.restaurant_id, added=db_review.rating)
     db.commit()
-    db.refresh(db_review)
     return db_review
 
-def update_review(db: Session, review_id: int, review_update: ReviewUpdate):
-    """Updates an existing review."""
-    db_review = db.query(reviews.Review).filter(reviews.Review.id == review_id).first()
-    if not db_review:
-        return None
-    
+def update_review(db: Session, db_review: reviews.Review, review_update: ReviewUpdate):
+    """
+    Updates a review already loaded by the caller with a single UPDATE ... RETURNING.
+    The row is locked while its current rating is read, so the counters move by
+    what this update really changed even if the review is edited concurrently.
+    Returns None if the review was deleted in the meantime.
+    """
     update_data = review_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_review, key, value)
-    
-    db.add(db_review)
+    if not update_data:
+        return db_review
+    if "rating" in update_data:
+        update_data["rating"] = _stars(update_data["rating"])
+    old_rating = db.scalar(
+        select(reviews.Review.rating).where(reviews.Review.id == db_review.id).with_for_update()
+    )
+    if old_rating is None:
+        db.rollback()
+        return None
+
+    db_review = db.scalars(
+        update(reviews.Review).where(reviews.Review.id == db_review.id).values(**update_data).returning(reviews.Review),
+        execution_options={"populate_existing": True}
+    ).first()
+    if db_review.rating != old_rating:
+        _apply_review_stats(db, db_review.restaurant_id, added=db_review.rating, removed=old_rating)
     db.commit()
-    db.refresh(db_review)
     return db_review
 
-def delete_review(db: Session, review_id: int):
-    """Deletes a review."""
-    db_review = db.query(reviews.Review).filter(reviews.Review.id == review_id).first()
-    if db_review:
-        db.delete(db_review)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+def delete_review(db: Session, db_review: reviews.Review) -> bool:
+    """
+    Deletes a review already loaded by the caller with DELETE ... RETURNING, so
+    the counters only move for the request that actually removed the row.
+    Returns False if it was already deleted.
+    """
+    deleted = db.execute(
+        delete(reviews.Review).where(reviews.Review.id == db_review.id)
+        .returning(reviews.Review.restaurant_id, reviews.Review.rating)
+    ).first()
+    if deleted is None:
+        db.rollback()
+        return False
+    _apply_review_stats(db, deleted.restaurant_id, removed=deleted.rating)
+    db.commit()
+    return True
\ No newline at end of file
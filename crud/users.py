@@ -1,18 +1,19 @@
 # --- User CRUD Operations ---
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, update, select, lambda_stmt
 from typing import List, Optional
 from auth import get_password_hash
 from models import users
 from schemas.users import UserCreate, UserUpdate
 
 def get_user(db: Session, user_id: int):
-    """Fetches a user by their ID."""
-    return db.query(users.User).filter(users.User.id == user_id).first()
+    """Fetches a user by their ID, from the session's identity map if already loaded."""
+    return db.get(users.User, user_id)
 
 def get_user_by_email(db: Session, email: str):
     """Fetches a user by their email."""
-    return db.query(users.User).filter(users.User.email == email).first()
+    # A lambda statement is built and compiled once; later calls only bind the email
+    return db.scalars(lambda_stmt(lambda: select(users.User).where(users.User.email == email).limit(1))).first()
 
 def create_user(db: Session, user: UserCreate):
     """Creates a new user in the database."""
@@ -26,28 +27,25 @@ def create_user(db: Session, user: UserCreate):
     )
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate):
-    """Updates an existing user's information."""
-    db_user = db.query(users.User).filter(users.User.id == user_id).first()
-    if not db_user:
-        return None
-    
+    """Updates an existing user's information with a single UPDATE ... RETURNING."""
     # Update fields from the schema if they are provided
     update_data = user_update.model_dump(exclude_unset=True) 
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    if not update_data:
+        return db.get(users.User, user_id)
     
-    db.add(db_user)
+    db_user = db.scalars(
+        update(users.User).where(users.User.id == user_id).values(**update_data).returning(users.User),
+        execution_options={"populate_existing": True}
+    ).first()
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def delete_user(db: Session, user_id: int):
     """Deletes a user from the database."""
-    db_user = db.query(users.User).filter(users.User.id == user_id).first()
+    db_user = db.get(users.User, user_id)
     if db_user:
         db.delete(db_user)
         db.commit()
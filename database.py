@@ -1,16 +1,27 @@
 # database.py
 
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from typing import List
+
+from fastapi import Response
+from fastapi.requests import HTTPConnection
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from load_shedding import LOAD_SHEDDING_ENABLED, db_concurrency_limiter, request_priority
+from settings import settings
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Database URL is fetched from environment variables
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = settings.database_url
+DATABASE_REPLICA_URLS = settings.split(settings.database_replica_urls)
+REPLICA_BALANCING = settings.replica_balancing
+REPLICA_HEALTH_CHECK_SECONDS = 5.0
+READ_YOUR_WRITES_SECONDS = settings.read_your_writes_seconds
 
 # Create the SQLAlchemy engine
 engine = create_engine(DATABASE_URL)
@@ -18,21 +29,191 @@ engine = create_engine(DATABASE_URL)
 # Create a SessionLocal class to get a database session.
 # Each instance of SessionLocal will be a database session.
 # The sessionmaker creates a configured Session class.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit, so returning them from a write path does not
+# trigger another SELECT.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Base class for declarative models. All SQLAlchemy models will inherit from this.
 Base = declarative_base()
 
+# Read-only sessions; each one is bound to the engine picked by the replica router
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaRouter:
+    """
+    Picks the engine for read-only sessions among the healthy replicas.
+
+    A background thread probes every replica with SELECT 1 every
+    REPLICA_HEALTH_CHECK_SECONDS; replicas that fail are skipped until a
+    probe succeeds again. When no replica is healthy, reads fall back to
+    the primary.
+    """
+
+    def __init__(self, primary: Engine, replica_urls: List[str], balancing: str = REPLICA_BALANCING):
+        self.primary = primary
+        self.replicas = [create_engine(url, pool_pre_ping=True) for url in replica_urls]
+        self.balancing = balancing
+        self._healthy = [True] * len(self.replicas)
+        self._round_robin = itertools.count()
+        self._monitor = None
+        self._lock = threading.Lock()
+
+    def choose(self) -> Engine:
+        """Returns a healthy replica, balanced by open connections or in turn, or the primary."""
+        if not self.replicas:
+            return self.primary
+        self._start_monitor()
+        healthy = [replica for replica, is_healthy in zip(self.replicas, self._healthy) if is_healthy]
+        if not healthy:
+            return self.primary
+        if self.balancing == "round_robin":
+            return healthy[next(self._round_robin) % len(healthy)]
+        return min(healthy, key=lambda replica: replica.pool.checkedout())
+
+    def check_health(self):
+        """Probes every replica once and records the result."""
+        for index, replica in enumerate(self.replicas):
+            try:
+                with replica.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as e:
+                healthy = False
+                if self._healthy[index]:
+                    logger.warning(f"Read replica {replica.url.render_as_string(hide_password=True)} failed its health check: {e}")
+            self._healthy[index] = healthy
+
+    def _start_monitor(self):
+        with self._lock:
+            # A thread started before a fork does not exist in the child
+            if self._monitor is None or not self._monitor.is_alive():
+                self._monitor = threading.Thread(target=self._monitor_loop, name="replica-health-check", daemon=True)
+                self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(REPLICA_HEALTH_CHECK_SECONDS)
+            self.check_health()
+
+
+replica_router = ReplicaRouter(engine, DATABASE_REPLICA_URLS)
+
+
+def dispose_engines():
+    """
+    Forgets pooled connections inherited from a parent process; call it in
+    each worker after fork. The connections are left open for the parent
+    instead of being closed from the child, which would break them for both.
+    """
+    engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.dispose(close=False)
+
+# Read-your-writes: a request that may write hands the client a short-lived
+# cookie (and header, for clients without a cookie jar) holding the time until
+# which its reads go to the primary. The pin travels with the client, so it
+# holds whichever worker or instance serves the next request.
+PRIMARY_UNTIL_COOKIE = "primary_until"
+PRIMARY_UNTIL_HEADER = "X-Primary-Until"
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _pin_to_primary(response: Response):
+    """Tells the client to read from the primary for the next READ_YOUR_WRITES_SECONDS."""
+    primary_until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE, primary_until, max_age=max(1, round(READ_YOUR_WRITES_SECONDS)),
+        httponly=True, samesite="lax"
+    )
+    response.headers[PRIMARY_UNTIL_HEADER] = primary_until
+
+
+def _is_pinned_to_primary(connection: HTTPConnection) -> bool:
+    """
+    Whether the client wrote within READ_YOUR_WRITES_SECONDS, from the cookie or
+    header set by get_db. Times further ahead than a pin can reach are ignored,
+    so a client cannot keep itself on the primary.
+    """
+    primary_until = connection.cookies.get(PRIMARY_UNTIL_COOKIE) or connection.headers.get(PRIMARY_UNTIL_HEADER)
+    if not primary_until:
+        return False
+    try:
+        remaining = float(primary_until) - time.time()
+    except ValueError:
+        return False
+    return 0 < remaining <= READ_YOUR_WRITES_SECONDS
+
+
+def _admit(connection: HTTPConnection):
+    """
+    Passes a request using the primary through the adaptive concurrency
+    limiter, once per request. Returns its priority, or None if not limited.
+    """
+    if not LOAD_SHEDDING_ENABLED or connection.scope.get("db_admitted"):
+        return None
+    priority = request_priority(connection.scope.get("method", "GET"), connection.url.path)
+    if priority is not None:
+        db_concurrency_limiter.acquire(priority)
+        connection.scope["db_admitted"] = True
+    return priority
+
+
+def _check_out_timed(db):
+    """Checks the session's connection out now, reporting the wait for the pool to the limiter."""
+    db_concurrency_limiter.start_pool_wait()
+    started = time.monotonic()
+    try:
+        db.connection()
+    finally:
+        db_concurrency_limiter.record_pool_wait(time.monotonic() - started)
+
+
 # Dependency to get the database session
-def get_db():
+def get_db(connection: HTTPConnection, response: Response):
     """
     Dependency function to provide a database session.
     It yields a session that can be used in FastAPI path operations.
     The session is automatically closed after the request is finished.
+    A request that may write pins the client's reads to the primary for
+    READ_YOUR_WRITES_SECONDS, with a cookie and header on its response.
+    Requests are admitted by the adaptive concurrency limiter first, which
+    sheds low priority traffic with 503 when the pool is saturated.
     """
+    method = connection.scope.get("method", "GET")
+    # Response headers are sent before this dependency's teardown runs, so pin up front
+    if method not in _SAFE_METHODS and replica_router.replicas:
+        _pin_to_primary(response)
+    priority = _admit(connection)
     db = SessionLocal()
     try:
+        if priority is not None:
+            _check_out_timed(db)
+        yield db
+    finally:
+        db.close()
+        if priority is not None:
+            db_concurrency_limiter.release()
+
+
+def get_read_db(connection: HTTPConnection):
+    """
+    Dependency providing a session for read-only path operations.
+    It is bound to a read replica unless the client wrote recently (see
+    _pin_to_primary), in which case it uses the primary so they see their own
+    changes. Never write through this session.
+    """
+    bind = engine if _is_pinned_to_primary(connection) else replica_router.choose()
+    # Replicas have their own pools; only reads served by the primary count against its limit
+    priority = _admit(connection) if bind is engine else None
+    db = ReadSessionLocal(bind=bind)
+    try:
+        if priority is not None:
+            _check_out_timed(db)
         yield db
     finally:
         db.close()
+        if priority is not None:
+            db_concurrency_limiter.release()
 
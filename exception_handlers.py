@@ -47,13 +47,16 @@ async def custom_exception_handler(request: Request, exc: BaseCustomException) -
     """Handle custom application exceptions"""
     logger.error(f"Custom exception occurred: {exc.message}", exc_info=True)
     
-    return create_error_response(
+    response = create_error_response(
         status_code=exc.status_code,
         message=exc.message,
         error_type=type(exc).__name__,
         details=exc.details,
         request_id=getattr(request.state, 'request_id', None)
     )
+    if getattr(exc, "retry_after", None):
+        response.headers["Retry-After"] = str(exc.retry_after)
+    return response
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
@@ -1,7 +1,7 @@
 # exceptions.py
 
 from fastapi import status
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 
 class BaseCustomException(Exception):
     """""
@@ -96,6 +96,14 @@ class MenuItemNotFoundException(BaseCustomException):
         super().__init__(message, status.HTTP_404_NOT_FOUND)
 
 
+class MenuVersionNotFoundException(BaseCustomException):
+    """Raised when a menu version has not been published"""
+    
+    def __init__(self, restaurant_id: int, version: int):
+        message = f"Menu version {version} of restaurant {restaurant_id} not found"
+        super().__init__(message, status.HTTP_404_NOT_FOUND)
+
+
 class MenuItemUnavailableException(BaseCustomException):
     """Raised when menu item is unavailable"""
     
@@ -137,6 +145,14 @@ class InvalidOrderStatusException(BaseCustomException):
         super().__init__(message, status.HTTP_400_BAD_REQUEST)
 
 
+class InvalidOrderStatusTransitionException(BaseCustomException):
+    """Raised when an order cannot move from its current status to the requested one"""
+    
+    def __init__(self, order_id: int, current_status: str, new_status: str):
+        message = f"Order {order_id} cannot move from {current_status} to {new_status}"
+        super().__init__(message, status.HTTP_400_BAD_REQUEST)
+
+
 class EmptyCartException(BaseCustomException):
     """Raised when trying to place an order with empty cart"""
     
@@ -145,6 +161,30 @@ class EmptyCartException(BaseCustomException):
         super().__init__(message, status.HTTP_400_BAD_REQUEST)
 
 
+class CartItemNotFoundException(BaseCustomException):
+    """Raised when changing a menu item that is not in the cart"""
+    
+    def __init__(self, item_id: int):
+        message = f"Menu item with ID {item_id} is not in the cart"
+        super().__init__(message, status.HTTP_404_NOT_FOUND)
+
+
+class CartRestaurantMismatchException(BaseCustomException):
+    """Raised when adding an item from another restaurant than the one the cart is for"""
+    
+    def __init__(self, cart_restaurant_id: int, item_restaurant_id: int):
+        message = f"The cart holds items from restaurant {cart_restaurant_id}; clear it before adding items from restaurant {item_restaurant_id}"
+        super().__init__(message, status.HTTP_409_CONFLICT)
+
+
+class CartChangedException(BaseCustomException):
+    """Raised at checkout when prices or availability changed since items were added; the cart has been updated"""
+    
+    def __init__(self, changes: List[Dict[str, Any]]):
+        message = "Some items in the cart changed price or are no longer available. Review the cart and check out again"
+        super().__init__(message, status.HTTP_409_CONFLICT, {"changes": changes})
+
+
 # Review-related Exceptions
 class ReviewNotFoundException(BaseCustomException):
     """Raised when review is not found"""
@@ -215,4 +255,21 @@ class InvalidSearchParametersException(BaseCustomException):
     """Raised when search parameters are invalid"""
     
     def __init__(self, message: str = "Invalid search parameters"):
-        super().__init__(message, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        super().__init__(message, status.HTTP_400_BAD_REQUEST)
+
+
+# Rate limiting Exceptions
+class RateLimitExceededException(BaseCustomException):
+    """Raised when a client exceeds its request rate or concurrent request limit"""
+    
+    def __init__(self, retry_after: int, message: str = "Too many requests, please retry later"):
+        self.retry_after = retry_after
+        super().__init__(message, status.HTTP_429_TOO_MANY_REQUESTS, {"retry_after": retry_after})
+
+
+class ServiceOverloadedException(BaseCustomException):
+    """Raised when a request is shed because the database is saturated"""
+    
+    def __init__(self, retry_after: int, message: str = "Service is overloaded, please retry later"):
+        self.retry_after = retry_after
+        super().__init__(message, status.HTTP_503_SERVICE_UNAVAILABLE, {"retry_after": retry_after})
\ No newline at end of file
@@ -0,0 +1,54 @@
+# gunicorn.conf.py
+#
+# Production server profile: gunicorn manages several uvicorn worker
+# processes so the API uses every core. Start it with
+#
+#     gunicorn main:app
+#
+# (gunicorn reads this file from the working directory). The app is imported
+# once in the master and forked into the workers, which then drop the
+# database connections they inherited. Workers are recycled after a jittered
+# number of requests, and on SIGTERM each one stops accepting connections and
+# finishes its in-flight requests (e.g. orders being placed) before exiting.
+
+import multiprocessing
+import os
+
+from settings import settings
+
+bind = settings.bind
+worker_class = "uvicorn_worker.UvicornWorker"
+# One async worker per core. Each worker has its own connection pool (up to 15
+# connections), so keep workers * 15 under the database's max_connections.
+workers = settings.web_concurrency or multiprocessing.cpu_count()
+
+# Import the app before forking: workers start faster and share its memory pages
+preload_app = True
+
+# Restart each worker after about this many requests, staggered so they do not all restart at once
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+
+# Seconds a stopping worker gets to finish in-flight requests before it is killed
+graceful_timeout = settings.graceful_timeout
+# Seconds without a heartbeat before the master restarts a worker
+timeout = 60
+keepalive = 5
+
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers under Docker
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Trust X-Forwarded-For from the load balancer, so rate limits see client IPs
+forwarded_allow_ips = settings.forwarded_allow_ips
+
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    """Drops pooled connections the worker inherited from the master."""
+    from database import dispose_engines
+    from rate_limit import rate_limit_backend
+
+    dispose_engines()
+    if hasattr(rate_limit_backend, "engine"):
+        rate_limit_backend.engine.dispose(close=False)
@@ -0,0 +1,42 @@
+# jobs/menu_versions.py
+#
+# Every menu item change publishes a full copy of the restaurant's menu as a
+# new menu version (crud.menu.publish_menu_version), so menus edited often
+# pile up versions. This job deletes the versions nobody needs any more: all
+# but the newest few of each restaurant, unless an order or a cart was priced
+# from them. Run it periodically (e.g. daily from cron):
+#
+#     python -m jobs.menu_versions --keep-latest 10
+#
+# A deleted version answers 404 at GET /restaurants/{id}/menu/versions/{version}.
+# Orders moved to the Parquet archive (jobs/partitions.py) no longer keep
+# their versions.
+
+import argparse
+import logging
+
+from crud.menu import delete_unreferenced_menu_versions
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP_LATEST = 10
+
+
+def prune_menu_versions(keep_latest: int = DEFAULT_KEEP_LATEST) -> int:
+    """Deletes unreferenced menu versions beyond the newest `keep_latest` of each restaurant. Returns how many."""
+    db = SessionLocal()
+    try:
+        deleted = delete_unreferenced_menu_versions(db, keep_latest=keep_latest)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete menu versions no order or cart references.")
+    parser.add_argument("--keep-latest", type=int, default=DEFAULT_KEEP_LATEST, help="Newest versions kept per restaurant")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Deleted {prune_menu_versions(keep_latest=args.keep_latest)} menu versions")
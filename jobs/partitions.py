@@ -0,0 +1,174 @@
+# jobs/partitions.py
+#
+# Maintenance of the monthly partitions of the orders table. Run it
+# periodically (e.g. daily from cron):
+#
+#     python -m jobs.partitions ensure --months-ahead 3
+#     python -m jobs.partitions archive --retain-months 12
+#
+# `ensure` creates the partitions for the coming months. `archive` detaches
+# partitions older than the retention period, exports each one to a Parquet
+# file under ORDERS_ARCHIVE_DIR (a local path or a mounted bucket) and drops it.
+
+import argparse
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from database import engine
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+ORDERS_ARCHIVE_DIR = settings.orders_archive_dir
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_RETAIN_MONTHS = 12
+EXPORT_BATCH_SIZE = 10_000
+
+_PARTITION_NAME = re.compile(r"^orders_(\d{4})_(\d{2})$")
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("user_id", pa.int64()),
+    ("restaurant_id", pa.int64()),
+    ("items", pa.string()), # JSON text, as stored
+    ("status", pa.string()),
+    ("total_price", pa.float64()),
+    ("menu_version", pa.int64()), # Menu version the order was priced from; null before versioning
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("updated_at", pa.timestamp("us", tz="UTC")),
+])
+
+
+def add_months(month: date, count: int) -> date:
+    """Returns the first day of the month `count` months after `month`."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"orders_{month:%Y_%m}"
+
+
+def list_order_partitions(connection: Connection) -> List[Tuple[str, date]]:
+    """Returns the (name, month) of every monthly orders partition, oldest first."""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'orders'"
+    )).scalars()
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_month_partition(connection: Connection, month: date):
+    """
+    Creates the partition for one month. Orders of that month that already
+    landed in orders_default are moved into it, since Postgres refuses to
+    attach a range the default partition holds rows for.
+    """
+    name = partition_name(month)
+    start, end = f"{month:%Y-%m-%d} 00:00:00+00", f"{add_months(month, 1):%Y-%m-%d} 00:00:00+00"
+    connection.execute(text(f"CREATE TABLE {name} (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = connection.execute(text(
+        f"WITH moved AS (DELETE FROM orders_default WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end}).rowcount
+    connection.execute(text(f"ALTER TABLE orders ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    logger.info(f"Created partition {name}" + (f", moved {moved} orders out of orders_default" if moved else ""))
+
+
+def ensure_order_partitions(months_ahead: int = DEFAULT_MONTHS_AHEAD) -> List[str]:
+    """Creates any missing partitions from the current month to `months_ahead` months from now."""
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    created = []
+    with engine.begin() as connection:
+        existing = {month for _, month in list_order_partitions(connection)}
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                create_month_partition(connection, month)
+                created.append(partition_name(month))
+    return created
+
+
+def export_partition(table_name: str, archive_dir: str) -> str:
+    """Writes every row of a detached partition to <archive_dir>/<table_name>.parquet, in batches."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{table_name}.parquet")
+    partial_path = f"{path}.partial"
+    rows_written = 0
+    with engine.connect() as connection, pq.ParquetWriter(partial_path, ARCHIVE_SCHEMA) as writer:
+        result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(text(
+            f"SELECT id, user_id, restaurant_id, items::text AS items, status::text AS status, "
+            f"total_price, menu_version, created_at, updated_at FROM {table_name} ORDER BY created_at, id"
+        ))
+        for batch in result.mappings().partitions():
+            writer.write_table(pa.Table.from_pylist([dict(row) for row in batch], schema=ARCHIVE_SCHEMA))
+            rows_written += len(batch)
+        expected = connection.execute(text(f"SELECT count(*) FROM {table_name}")).scalar()
+    if rows_written != expected:
+        raise RuntimeError(f"Exported {rows_written} of {expected} rows from {table_name}")
+    # Only a complete file gets the final name
+    os.replace(partial_path, path)
+    return path
+
+
+def archive_order_partitions(retain_months: int = DEFAULT_RETAIN_MONTHS, archive_dir: str = ORDERS_ARCHIVE_DIR) -> List[str]:
+    """
+    Moves monthly partitions that ended more than `retain_months` months ago
+    to Parquet files and drops them. Returns the paths written.
+
+    Each partition is detached in its own short transaction first, so the
+    export does not hold locks on orders. A partition left detached by an
+    interrupted run is picked up again by the next one.
+    """
+    cutoff = add_months(datetime.now(timezone.utc).date().replace(day=1), -retain_months)
+    with engine.begin() as connection:
+        for name, month in list_order_partitions(connection):
+            if month < cutoff:
+                connection.execute(text(f"ALTER TABLE orders DETACH PARTITION {name}"))
+                logger.info(f"Detached partition {name}")
+        detached = connection.execute(text(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname ~ '^orders_[0-9]{4}_[0-9]{2}$'"
+        )).scalars().all()
+
+    paths = []
+    for name in sorted(detached):
+        path = export_partition(name, archive_dir)
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Archived partition {name} to {path}")
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of the orders table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = commands.add_parser("ensure", help="Create partitions for the coming months")
+    ensure_parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+    archive_parser = commands.add_parser("archive", help="Export old partitions to Parquet and drop them")
+    archive_parser.add_argument("--retain-months", type=int, default=DEFAULT_RETAIN_MONTHS)
+    archive_parser.add_argument("--archive-dir", default=ORDERS_ARCHIVE_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "ensure":
+        created = ensure_order_partitions(months_ahead=args.months_ahead)
+        logger.info(f"Created {len(created)} partitions")
+    else:
+        archived = archive_order_partitions(retain_months=args.retain_months, archive_dir=args.archive_dir)
+        logger.info(f"Archived {len(archived)} partitions")
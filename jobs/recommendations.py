@@ -0,0 +1,107 @@
+# jobs/recommendations.py
+#
+# Offline batch job that rebuilds the restaurant_similarities table used by
+# GET /restaurants/{id}/similar and GET /users/me/recommendations.
+# Run it periodically (e.g. nightly from cron):
+#
+#     python -m jobs.recommendations --top-n 20
+
+import argparse
+import logging
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from crud.recommendations import (
+    get_favorite_interactions,
+    get_delivered_order_interactions,
+    replace_restaurant_similarities
+)
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# A favorite is a stronger signal than a single delivered order
+FAVORITE_WEIGHT = 3.0
+DEFAULT_TOP_N = 20
+
+
+def build_interaction_matrix(
+    favorites: List[Tuple[int, int]],
+    delivered_orders: List[Tuple[int, int, int]]
+) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Builds the sparse user x restaurant interaction matrix.
+
+    A cell is FAVORITE_WEIGHT if the user favorited the restaurant plus
+    log1p(delivered orders) from that restaurant. Returns the matrix and the
+    restaurant ID of each column.
+    """
+    fav = np.asarray(favorites, dtype=np.int64).reshape(-1, 2)
+    ordered = np.asarray(delivered_orders, dtype=np.int64).reshape(-1, 3)
+
+    user_ids = np.concatenate([fav[:, 0], ordered[:, 0]])
+    restaurant_ids = np.concatenate([fav[:, 1], ordered[:, 1]])
+    weights = np.concatenate([np.full(len(fav), FAVORITE_WEIGHT), np.log1p(ordered[:, 2])])
+
+    users, rows = np.unique(user_ids, return_inverse=True)
+    columns_ids, columns = np.unique(restaurant_ids, return_inverse=True)
+    # Duplicate (row, column) entries are summed by the CSR conversion
+    matrix = sparse.coo_matrix((weights, (rows, columns)), shape=(len(users), len(columns_ids))).tocsr()
+    return matrix, columns_ids
+
+
+def compute_similarities(matrix: sparse.csr_matrix, restaurant_ids: np.ndarray, top_n: int = DEFAULT_TOP_N) -> List[dict]:
+    """
+    Computes item-item cosine similarity with sparse products and keeps the
+    top_n neighbours of every restaurant as rows for restaurant_similarities.
+    """
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    normalized = matrix @ sparse.diags(1.0 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    rows = []
+    for column in range(similarity.shape[0]):
+        start, end = similarity.indptr[column], similarity.indptr[column + 1]
+        neighbours, scores = similarity.indices[start:end], similarity.data[start:end]
+        if len(scores) > top_n:
+            keep = np.argpartition(scores, -top_n)[-top_n:]
+            neighbours, scores = neighbours[keep], scores[keep]
+        order = np.argsort(scores)[::-1]
+        rows.extend(
+            {
+                "restaurant_id": int(restaurant_ids[column]),
+                "similar_restaurant_id": int(restaurant_ids[neighbours[k]]),
+                "score": float(scores[k]),
+                "rank": rank,
+            }
+            for rank, k in enumerate(order, start=1)
+        )
+    return rows
+
+
+def rebuild_restaurant_similarities(top_n: int = DEFAULT_TOP_N) -> int:
+    """Recomputes and stores the similarity table. Returns the number of rows written."""
+    db = SessionLocal()
+    try:
+        matrix, restaurant_ids = build_interaction_matrix(
+            get_favorite_interactions(db), get_delivered_order_interactions(db)
+        )
+        logger.info(f"Interaction matrix: {matrix.shape[0]} users x {matrix.shape[1]} restaurants, {matrix.nnz} interactions")
+        similarities = compute_similarities(matrix, restaurant_ids, top_n=top_n)
+        replace_restaurant_similarities(db, similarities)
+        return len(similarities)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild restaurant similarities for recommendations.")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N, help="Neighbours stored per restaurant")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Stored {rebuild_restaurant_similarities(top_n=args.top_n)} restaurant similarities")
@@ -0,0 +1,145 @@
+# load_shedding.py
+#
+# Adaptive limit on concurrent requests using the primary database, applied
+# by get_db. When connections take too long to check out of the pool the
+# limit shrinks (multiplicative decrease); while they come quickly and the
+# limit is in use it grows back by about one per round of requests (additive
+# increase). Low priority traffic may only use part of the limit, so it is
+# shed first while order placement keeps flowing.
+
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from exceptions import ServiceOverloadedException
+from settings import settings
+
+LOAD_SHEDDING_ENABLED = settings.load_shedding_enabled
+TARGET_POOL_WAIT_SECONDS = settings.target_pool_wait_ms / 1000
+INITIAL_CONCURRENCY_LIMIT = settings.initial_concurrency_limit
+MIN_CONCURRENCY_LIMIT = 2.0
+MAX_CONCURRENCY_LIMIT = settings.max_concurrency_limit
+DECREASE_FACTOR = 0.9
+# At most one decrease per interval, so one slow burst does not collapse the limit
+DECREASE_INTERVAL_SECONDS = 0.5
+SHED_RETRY_AFTER_SECONDS = 1
+
+# Share of the limit each priority may use
+PRIORITY_SHARES = {
+    "critical": 1.0,
+    "normal": 0.85,
+    "low": 0.5,
+}
+
+# Route priorities, first match wins: (methods or None for any, path prefix, priority)
+REQUEST_PRIORITIES: List[Tuple[Optional[set], str, str]] = [
+    ({"POST"}, "/orders", "critical"),
+    ({"POST"}, "/cart/checkout", "critical"),
+    ({"PUT"}, "/orders/", "critical"),
+    ({"GET"}, "/search", "low"),
+    ({"GET"}, "/reports", "low"),
+    ({"GET"}, "/orders/admin", "low"),
+    ({"GET"}, "/users/", "low"),
+]
+
+
+def request_priority(method: str, path: str) -> Optional[str]:
+    """Returns the priority of a request: critical, normal or low, or None if it is not limited."""
+    # Event streams release their session before streaming but keep the request open
+    if path.endswith("/events"):
+        return None
+    for methods, prefix, priority in REQUEST_PRIORITIES:
+        if (methods is None or method in methods) and path.startswith(prefix):
+            # /users/me/ is the caller's own profile, not the admin user listing
+            if priority == "low" and path.startswith("/users/me"):
+                continue
+            return priority
+    return "normal"
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit driven by observed pool wait times."""
+
+    def __init__(
+        self,
+        initial_limit: float = INITIAL_CONCURRENCY_LIMIT,
+        min_limit: float = MIN_CONCURRENCY_LIMIT,
+        max_limit: float = MAX_CONCURRENCY_LIMIT,
+        target_wait: float = TARGET_POOL_WAIT_SECONDS,
+    ):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_wait = target_wait
+        self.in_flight = 0
+        self.waiting_for_pool = 0
+        self.last_pool_wait = 0.0
+        self.shed = Counter()
+        self.admitted = Counter()
+        self._decreased_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: str = "normal"):
+        """Admits a request or raises ServiceOverloadedException."""
+        with self._lock:
+            if self.in_flight >= self.limit * PRIORITY_SHARES[priority]:
+                self.shed[priority] += 1
+                raise ServiceOverloadedException(SHED_RETRY_AFTER_SECONDS)
+            self.in_flight += 1
+            self.admitted[priority] += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def start_pool_wait(self):
+        with self._lock:
+            self.waiting_for_pool += 1
+
+    def record_pool_wait(self, seconds: float):
+        """Adjusts the limit from how long a connection checkout took."""
+        now = time.monotonic()
+        with self._lock:
+            self.waiting_for_pool -= 1
+            self.last_pool_wait = seconds
+            if seconds > self.target_wait:
+                if now - self._decreased_at >= DECREASE_INTERVAL_SECONDS:
+                    self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                    self._decreased_at = now
+            elif self.in_flight >= self.limit * 0.8:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+    def render_metrics(self, pool) -> str:
+        """Returns the limiter's and the pool's state in the Prometheus text format."""
+        with self._lock:
+            lines = [
+                "# HELP db_concurrency_limit Current adaptive limit on concurrent database requests.",
+                "# TYPE db_concurrency_limit gauge",
+                f"db_concurrency_limit {self.limit:.3f}",
+                "# HELP db_requests_in_flight Admitted requests holding a database session.",
+                "# TYPE db_requests_in_flight gauge",
+                f"db_requests_in_flight {self.in_flight}",
+                "# HELP db_pool_waiting_requests Requests waiting for a pooled connection.",
+                "# TYPE db_pool_waiting_requests gauge",
+                f"db_pool_waiting_requests {self.waiting_for_pool}",
+                "# HELP db_pool_last_wait_seconds Time the latest request waited for a pooled connection.",
+                "# TYPE db_pool_last_wait_seconds gauge",
+                f"db_pool_last_wait_seconds {self.last_pool_wait:.6f}",
+                "# HELP db_pool_checked_out_connections Connections currently checked out of the pool.",
+                "# TYPE db_pool_checked_out_connections gauge",
+                f"db_pool_checked_out_connections {pool.checkedout()}",
+                "# HELP db_requests_admitted_total Requests admitted by the concurrency limiter.",
+                "# TYPE db_requests_admitted_total counter",
+            ]
+            lines += [f'db_requests_admitted_total{{priority="{priority}"}} {self.admitted[priority]}' for priority in PRIORITY_SHARES]
+            lines += [
+                "# HELP db_requests_shed_total Requests rejected with 503 by the concurrency limiter.",
+                "# TYPE db_requests_shed_total counter",
+            ]
+            lines += [f'db_requests_shed_total{{priority="{priority}"}} {self.shed[priority]}' for priority in PRIORITY_SHARES]
+        return "\n".join(lines) + "\n"
+
+
+db_concurrency_limiter = AdaptiveConcurrencyLimiter()
@@ -1,17 +1,19 @@
 # main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from database import engine, Base, get_db
 import models
-from routers import users, restaurants, orders, reviews, favorites, search
-import os
-from dotenv import load_dotenv
+from routers import users, restaurants, orders, reviews, favorites, search, reports, cart
 from exception_handlers import register_exception_handlers
 import exceptions
-
-# Load environment variables
-load_dotenv()
+from services.outbox import outbox_dispatcher, OUTBOX_DISPATCH_IN_APP
+from services.warmup import warmup
+from rate_limit import RateLimitMiddleware
+from middleware import CompressionMiddleware
+from load_shedding import db_concurrency_limiter
 
 # Create all database tables defined in models.py
 # This is for initial setup. In production, use Alembic for migrations.
@@ -23,13 +25,33 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("Database tables created.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts background workers and the warm-up when the application starts and
+    stops them on shutdown.
+    """
+    warmup.start()
+    if OUTBOX_DISPATCH_IN_APP:
+        outbox_dispatcher.start()
+    yield
+    await warmup.stop()
+    await outbox_dispatcher.stop()
+
 # Initialize FastAPI app
 app = FastAPI(
-    title="Zomato Clone Backend API")
+    title="Zomato Clone Backend API",
+    lifespan=lifespan)
 
 # Register exception handlers
 register_exception_handlers(app)
 
+# Reject clients over their rate or concurrency limits before any other work
+app.add_middleware(RateLimitMiddleware)
+
+# Compress large responses; added last so it wraps everything, 429s included
+app.add_middleware(CompressionMiddleware)
+
 @app.get("/healthcheckpoint", tags=["Health"])
 async def health_check():
     return {
@@ -37,13 +59,30 @@ async def health_check():
         "message": "Zomato Clone API is running successfully"
     }
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness check: 503 until this worker's startup warm-up has completed.
+    Unlike /healthcheckpoint (liveness), route traffic only once this is 200.
+    """
+    if not warmup.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "warming_up"})
+    return {"status": "ready", "warmup_seconds": warmup.duration}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Concurrency limiter and connection pool metrics in the Prometheus text format."""
+    return db_concurrency_limiter.render_metrics(engine.pool)
+
 # Include routers
 app.include_router(users.router)
 app.include_router(restaurants.router)
 app.include_router(orders.router)
+app.include_router(cart.router)
 app.include_router(reviews.router)
 app.include_router(favorites.router)
 app.include_router(search.router)
+app.include_router(reports.router)
 
 # Optional: Create tables on startup (for development)
 # In production, use Alembic migrations instead
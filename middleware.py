@@ -0,0 +1,82 @@
+# middleware.py
+#
+# Response compression. Large JSON listings shrink several times over with
+# gzip or brotli; small bodies are sent as they are, since compressing them
+# costs more CPU than it saves on the wire.
+
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+from settings import settings
+
+try:
+    import brotli
+except ImportError: # Brotli is optional; gzip is used without it
+    brotli = None
+
+COMPRESSION_MIN_SIZE = settings.compression_min_size
+GZIP_LEVEL = settings.gzip_level
+BROTLI_QUALITY = settings.brotli_quality
+COMPRESSION_ENCODINGS = settings.split(settings.compression_encodings)
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = BROTLI_QUALITY):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # Flush each chunk so streamed responses are not held back
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parses an Accept-Encoding header into {encoding: q-value}."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if encoding:
+            accepted[encoding.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least COMPRESSION_MIN_SIZE bytes with brotli
+    (when installed) or gzip, whichever the client accepts first in
+    COMPRESSION_ENCODINGS order. Event streams and responses that already
+    have a Content-Encoding are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        responder = IdentityResponder(self.app, self.minimum_size)
+        for encoding in COMPRESSION_ENCODINGS:
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            if encoding == "br" and brotli is not None:
+                responder = BrotliResponder(self.app, self.minimum_size)
+                break
+            if encoding == "gzip":
+                responder = GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+                break
+        await responder(scope, receive, send)
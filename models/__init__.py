@@ -1,16 +1,22 @@
 from models.users import User, UserRole
 from models.restaurants import Restaurant
-from models.menu import MenuItem
+from models.menu import MenuItem, MenuVersion
 from models.orders import Order, OrderStatus
-from models.reviews import Review
+from models.reviews import Review, RestaurantReviewStats
 from models.fevorites import Favorite
+from models.recommendations import RestaurantSimilarity
+from models.outbox import OutboxEvent, OutboxStatus
+from models.carts import Cart
 
 # for SQLAlchemy can find them the schemas
 __all__ = [
     "User", "UserRole",
     "Restaurant", 
-    "MenuItem",
+    "MenuItem", "MenuVersion",
     "Order", "OrderStatus",
-    "Review",
-    "Favorite"
+    "Review", "RestaurantReviewStats",
+    "Favorite",
+    "RestaurantSimilarity",
+    "OutboxEvent", "OutboxStatus",
+    "Cart"
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON
+from sqlalchemy.sql import func
+from database import Base
+
+class Cart(Base):
+    """
+    SQLAlchemy model for the 'carts' table.
+    One server-side cart per user (see services/cart.py). Each line keeps the
+    price and name the menu item had when it was last validated, so checkout
+    commits this snapshot instead of loading and validating the whole menu.
+    """
+    __tablename__ = "carts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True) # All lines come from one restaurant
+    items = Column(JSON, nullable=False) # [{"menu_item_id", "name", "quantity", "unit_price"}]
+    menu_version = Column(Integer, nullable=True) # Menu version every line matches, if any
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True) # Pushed back on every change
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -10,11 +10,17 @@ class Favorite(Base):
     Stores user's favorite restaurants.
     """
     __tablename__ = "favorites"
+    # One row per user and restaurant; also serves lookups by user_id
+    __table_args__ = (
+        UniqueConstraint("user_id", "restaurant_id", name="uq_favorites_user_restaurant"),
+        # Keyset pagination of a user's favorites, newest first
+        Index("ix_favorites_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", back_populates="favorite_restaurants")
-    restaurant = relationship("Restaurant", back_populates="favorites")
\ No newline at end of file
+    user = relationship("User", back_populates="favorite_restaurants", lazy="raise_on_sql")
+    restaurant = relationship("Restaurant", back_populates="favorites", lazy="raise_on_sql")
\ No newline at end of file
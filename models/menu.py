@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -21,4 +21,22 @@ class MenuItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    restaurant = relationship("Restaurant", back_populates="menu_items")
+    restaurant = relationship("Restaurant", back_populates="menu_items", lazy="raise_on_sql")
+
+class MenuVersion(Base):
+    """
+    SQLAlchemy model for the 'menu_versions' table.
+    An immutable snapshot of a restaurant's whole menu, published in the same
+    transaction as every change to its menu items (see crud/menu.py). Versions
+    count up from 1 per restaurant; restaurants.menu_version is the current one.
+    """
+    __tablename__ = "menu_versions"
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "version", name="uq_menu_versions_restaurant_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    body = Column(Text, nullable=False) # The menu rendered once as JSON (schemas.menu.MenuVersionResponse), served as is
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON, DDL, Index, PrimaryKeyConstraint, event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -10,23 +10,63 @@ class OrderStatus(str, enum.Enum):
     CONFIRMED = "confirmed"
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
+
+# Order state machine: status -> statuses it may move to
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+# Statuses after which an order never changes again
+TERMINAL_ORDER_STATUSES = {status for status, targets in ORDER_STATUS_TRANSITIONS.items() if not targets}
     
 class Order(Base):
     """
     SQLAlchemy model for the 'orders' table.
     Stores customer orders.
+
+    The table is range partitioned by created_at into monthly partitions
+    (orders_YYYY_MM) plus orders_default for rows outside them; see
+    jobs/partitions.py. Postgres requires the partition key in the primary
+    key, so the table's key is (id, created_at) while the ORM identifies
+    orders by id alone, which the sequence keeps unique.
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at", name="orders_pkey"),
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # Review eligibility: has this user had an order from this restaurant delivered?
+        Index(
+            "ix_orders_user_restaurant_delivered", "user_id", "restaurant_id",
+            postgresql_where=text("status = 'DELIVERED'")
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     # items will be stored as JSON: [{"menu_item_id": 1, "quantity": 2}, ...]
     items = Column(JSON)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     total_price = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # The menu_versions.version the order was priced from; prices are still copied into items for reports
+    menu_version = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="orders")
-    restaurant = relationship("Restaurant", back_populates="orders")
+    user = relationship("User", back_populates="orders", lazy="raise_on_sql")
+    restaurant = relationship("Restaurant", back_populates="orders", lazy="raise_on_sql")
+
+    __mapper_args__ = {"primary_key": [id]}
+
+# A partitioned table rejects rows no partition accepts; the default partition
+# keeps inserts working until the monthly partitions are created
+event.listen(
+    Order.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT")
+)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON, Index, text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+import enum
+
+# Define Enum for outbox event status
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed" # Gave up after the maximum number of attempts
+
+class OutboxEvent(Base):
+    """
+    SQLAlchemy model for the 'outbox_events' table.
+    Side effects of a write (notifications, rollups, ...) recorded in the same
+    transaction as the write and delivered later by services/outbox.py.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Only pending events are ever polled
+        Index("ix_outbox_events_pending", "available_at", postgresql_where=text("status = 'PENDING'")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False) # e.g., "order.created"
+    aggregate_id = Column(Integer, nullable=False) # ID of the row the event is about
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) # Not retried before this time
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
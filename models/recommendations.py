@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+import enum
+
+class RestaurantSimilarity(Base):
+    """
+    SQLAlchemy model for the 'restaurant_similarities' table.
+    Stores the precomputed top-N most similar restaurants for each restaurant.
+    Rebuilt offline by jobs/recommendations.py.
+    """
+    __tablename__ = "restaurant_similarities"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    similar_restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False) # Cosine similarity of user interactions
+    rank = Column(Integer, nullable=False) # 1 = most similar
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -20,10 +20,11 @@ class Restaurant(Base):
     rating = Column(Float, default=0.0) # Average rating calculated from reviews
     opening_hours = Column(String) # e.g., "9:00 AM - 10:00 PM"
     is_active = Column(Boolean, default=True) # If restaurant is operational
+    menu_version = Column(Integer, default=0, server_default="0", nullable=False) # Current menu_versions.version; 0 until the first menu item
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    menu_items = relationship("MenuItem", back_populates="restaurant")
-    orders = relationship("Order", back_populates="restaurant")
-    reviews = relationship("Review", back_populates="restaurant")
-    favorites = relationship("Favorite", back_populates="restaurant")
\ No newline at end of file
+    menu_items = relationship("MenuItem", back_populates="restaurant", lazy="raise_on_sql")
+    orders = relationship("Order", back_populates="restaurant", lazy="raise_on_sql")
+    reviews = relationship("Review", back_populates="restaurant", lazy="raise_on_sql")
+    favorites = relationship("Favorite", back_populates="restaurant", lazy="raise_on_sql")
\ No newline at end of file
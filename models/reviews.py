@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -9,6 +9,13 @@ import enum
 """
 class Review(Base):
     __tablename__ = "reviews"
+    # One review per user and restaurant
+    __table_args__ = (
+        UniqueConstraint("user_id", "restaurant_id", name="uq_reviews_user_restaurant"),
+        # Review listings sorted by recency or rating
+        Index("ix_reviews_restaurant_created", "restaurant_id", "created_at"),
+        Index("ix_reviews_restaurant_rating", "restaurant_id", "rating", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -18,7 +25,24 @@ class Review(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="reviews")
-    restaurant = relationship("Restaurant", back_populates="reviews")
-    
-    
\ No newline at end of file
+    user = relationship("User", back_populates="reviews", lazy="raise_on_sql")
+    restaurant = relationship("Restaurant", back_populates="reviews", lazy="raise_on_sql")
+
+class RestaurantReviewStats(Base):
+    """
+    SQLAlchemy model for the 'restaurant_review_stats' table.
+    Review counters per restaurant, kept up to date by crud/reviews.py in the
+    same transaction as every review insert, update and delete.
+    """
+    __tablename__ = "restaurant_review_stats"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_total = Column(Integer, nullable=False, default=0)
+    # Histogram: number of reviews with each star rating
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
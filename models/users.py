@@ -27,6 +27,6 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
 
-    orders = relationship("Order", back_populates="user")
-    reviews = relationship("Review", back_populates="user")
-    favorite_restaurants = relationship("Favorite", back_populates="user")
\ No newline at end of file
+    orders = relationship("Order", back_populates="user", lazy="raise_on_sql")
+    reviews = relationship("Review", back_populates="user", lazy="raise_on_sql")
+    favorite_restaurants = relationship("Favorite", back_populates="user", lazy="raise_on_sql")
\ No newline at end of file
@@ -0,0 +1,217 @@
+# rate_limit.py
+#
+# Token bucket rate limiting and per-client concurrency limiting, applied as
+# ASGI middleware so rejected requests never reach routing, authentication or
+# get_db. Clients are identified by the user_id of a valid bearer token, or by
+# IP address for anonymous requests (run uvicorn with --proxy-headers behind a
+# load balancer so the client address is the real one).
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException
+from fastapi.requests import HTTPConnection
+from sqlalchemy import create_engine, text
+
+from auth import decode_access_token
+from exception_handlers import create_error_response
+from exceptions import RateLimitExceededException
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = settings.rate_limit_enabled
+RATE_LIMIT_BACKEND = settings.rate_limit_backend
+MAX_CONCURRENT_REQUESTS_PER_CLIENT = settings.max_concurrent_requests_per_client
+
+
+class RateLimitRule:
+    """A token bucket: `capacity` requests in a burst, refilled at `refill_per_second`."""
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float, limit_concurrency: bool = True):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        # Long-lived streams (SSE) would hold a concurrency slot for their whole lifetime
+        self.limit_concurrency = limit_concurrency
+
+
+# Route groups, first match wins: (methods or None for any, path prefix, rule)
+RATE_LIMIT_RULES: List[Tuple[Optional[set], str, Optional[RateLimitRule]]] = [
+    (None, "/healthcheckpoint", None),
+    (None, "/ready", None),
+    (None, "/docs", None),
+    (None, "/openapi.json", None),
+    (None, "/metrics", None),
+    ({"POST"}, "/users/login", RateLimitRule("login", capacity=5, refill_per_second=5 / 60)),
+    ({"POST"}, "/users/register", RateLimitRule("register", capacity=5, refill_per_second=5 / 3600)),
+    ({"POST"}, "/orders", RateLimitRule("place_order", capacity=5, refill_per_second=10 / 60)),
+    ({"POST"}, "/cart/checkout", RateLimitRule("place_order", capacity=5, refill_per_second=10 / 60)), # Same bucket as POST /orders
+    ({"GET"}, "/search", RateLimitRule("search", capacity=20, refill_per_second=2)),
+    ({"GET"}, "/reports", RateLimitRule("reports", capacity=10, refill_per_second=10 / 60)),
+    (None, "/", RateLimitRule("default", capacity=60, refill_per_second=10)),
+]
+
+
+def match_rule(method: str, path: str) -> Optional[RateLimitRule]:
+    """Returns the rule of the first route group matching the request, None if it is exempt."""
+    for methods, prefix, rule in RATE_LIMIT_RULES:
+        if (methods is None or method in methods) and path.startswith(prefix):
+            if rule is not None and path.endswith("/events"):
+                return RateLimitRule(rule.name, rule.capacity, rule.refill_per_second, limit_concurrency=False)
+            return rule
+    return None
+
+
+def client_key(connection: HTTPConnection) -> str:
+    """Identifies the client: the verified user ID if a valid token is sent, otherwise the IP address."""
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_access_token(token).user_id}"
+        except HTTPException:
+            pass # Invalid tokens are rejected later by authentication; limit them by IP
+    return f"ip:{connection.client.host if connection.client else 'unknown'}"
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets held by the current worker process."""
+
+    def __init__(self, max_clients: int = 100_000):
+        # Idle buckets are full again after at most an hour with the rules above
+        self._buckets: TTLCache = TTLCache(maxsize=max_clients, ttl=3600)
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        return self.take(key, rule, cost)
+
+    def take(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        """Takes `cost` tokens if available. Returns 0 on success, else seconds until they will be."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (rule.capacity, now))
+            tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_per_second)
+            allowed = tokens >= cost
+            self._buckets[key] = (tokens - cost if allowed else tokens, now)
+        return 0.0 if allowed else (cost - tokens) / rule.refill_per_second
+
+
+class PostgresRateLimitBackend:
+    """
+    Token buckets shared by every worker and instance, one row per bucket in
+    an UNLOGGED table (no WAL; its contents are disposable and are lost on a
+    crash). Each check is a single upsert on a small dedicated engine, so
+    rate limiting never competes with requests for the application pool.
+    The table is created by an Alembic migration. If it cannot be reached,
+    requests are allowed.
+    """
+
+    TABLE = "rate_limit_buckets"
+    PRUNE_INTERVAL_SECONDS = 300
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.engine = create_engine(database_url or settings.database_url, pool_size=2, max_overflow=2, pool_pre_ping=True)
+        self._pruned_at = 0.0
+
+    async def acquire(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        try:
+            return await asyncio.to_thread(self.take, key, rule, cost)
+        except Exception:
+            logger.exception("Shared rate limit check failed; allowing the request")
+            return 0.0
+
+    def take(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        """Takes `cost` tokens if available. Returns 0 on success, else seconds until they will be."""
+        refilled = f"LEAST(:capacity, {self.TABLE}.tokens + EXTRACT(EPOCH FROM now() - {self.TABLE}.updated_at) * :rate)"
+        with self.engine.begin() as connection:
+            tokens, allowed = connection.execute(text(
+                f"INSERT INTO {self.TABLE} (key, tokens, allowed, updated_at) VALUES (:key, :capacity - :cost, true, now()) "
+                f"ON CONFLICT (key) DO UPDATE SET "
+                f"tokens = CASE WHEN {refilled} >= :cost THEN {refilled} - :cost ELSE {refilled} END, "
+                f"allowed = {refilled} >= :cost, "
+                f"updated_at = now() "
+                f"RETURNING tokens, allowed"
+            ), {"key": key, "capacity": rule.capacity, "rate": rule.refill_per_second, "cost": cost}).one()
+            if time.monotonic() - self._pruned_at > self.PRUNE_INTERVAL_SECONDS:
+                self._pruned_at = time.monotonic()
+                connection.execute(text(f"DELETE FROM {self.TABLE} WHERE updated_at < now() - interval '1 hour'"))
+        return 0.0 if allowed else (cost - tokens) / rule.refill_per_second
+
+
+class ConcurrencyLimiter:
+    """Counts each client's in-flight requests in this worker process."""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_REQUESTS_PER_CLIENT):
+        self.max_concurrent = max_concurrent
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def enter(self, key: str) -> bool:
+        with self._lock:
+            if self._in_flight.get(key, 0) >= self.max_concurrent:
+                return False
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            return True
+
+    def leave(self, key: str):
+        with self._lock:
+            remaining = self._in_flight.get(key, 1) - 1
+            if remaining:
+                self._in_flight[key] = remaining
+            else:
+                self._in_flight.pop(key, None)
+
+
+rate_limit_backend = PostgresRateLimitBackend() if RATE_LIMIT_BACKEND == "postgres" else InMemoryRateLimitBackend()
+concurrency_limiter = ConcurrencyLimiter()
+
+
+class RateLimitMiddleware:
+    """
+    Rejects requests with 429 and a Retry-After header when the client's
+    bucket for the route group is empty or it already has
+    MAX_CONCURRENT_REQUESTS_PER_CLIENT requests in flight.
+    """
+
+    def __init__(self, app, backend=None, concurrency=None):
+        self.app = app
+        self.backend = backend or rate_limit_backend
+        self.concurrency = concurrency or concurrency_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        rule = match_rule(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        key = client_key(HTTPConnection(scope))
+        retry_after = await self.backend.acquire(f"{rule.name}:{key}", rule)
+        if retry_after > 0:
+            return await self._reject(scope, receive, send, RateLimitExceededException(math.ceil(retry_after)))
+
+        if not rule.limit_concurrency:
+            return await self.app(scope, receive, send)
+        if not self.concurrency.enter(key):
+            return await self._reject(scope, receive, send, RateLimitExceededException(
+                1, message=f"Too many concurrent requests (limit {self.concurrency.max_concurrent})"
+            ))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.leave(key)
+
+    async def _reject(self, scope, receive, send, exc: RateLimitExceededException):
+        response = create_error_response(
+            status_code=exc.status_code,
+            message=exc.message,
+            error_type=type(exc).__name__,
+            details=exc.details
+        )
+        response.headers["Retry-After"] = str(exc.retry_after)
+        await response(scope, receive, send)
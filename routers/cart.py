@@ -0,0 +1,127 @@
+# routers/cart.py
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+
+from auth import get_current_user
+from database import get_db
+from services.cart import load_cart, add_cart_item, update_cart_item, remove_cart_item, clear_cart, checkout_cart
+from services.leaderboard import leaderboard
+import schemas.cart
+import schemas.orders
+import schemas.users
+from exceptions import BaseCustomException, DatabaseException
+
+router = APIRouter(
+    prefix="/cart",
+    tags=["Cart"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/", response_model=schemas.cart.CartResponse)
+async def view_cart(
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    View the authenticated user's cart, empty if they have none or it expired.
+    Requires authentication.
+    """
+    try:
+        return schemas.cart.CartResponse.from_cart(load_cart(db, current_user.id))
+    except Exception as e:
+        if isinstance(e, BaseCustomException):
+            raise
+        raise DatabaseException(f"Error fetching cart: {str(e)}")
+
+@router.post("/items", response_model=schemas.cart.CartResponse)
+async def add_item_to_cart(
+    item: schemas.cart.CartItemAdd,
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Add a menu item to the cart, or more of it if it is already there.
+    The item must be available and from the same restaurant as the rest of the cart;
+    it is priced at its current price.
+    Requires authentication.
+    """
+    try:
+        cart = add_cart_item(db, current_user.id, item.menu_item_id, item.quantity)
+        return schemas.cart.CartResponse.from_cart(cart)
+    except Exception as e:
+        if isinstance(e, BaseCustomException):
+            raise
+        raise DatabaseException(f"Error adding item to cart: {str(e)}")
+
+@router.put("/items/{menu_item_id}", response_model=schemas.cart.CartResponse)
+async def update_cart_item_quantity(
+    menu_item_id: int,
+    item: schemas.cart.CartItemUpdate,
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Set the quantity of an item already in the cart.
+    The item is validated and repriced again.
+    Requires authentication.
+    """
+    try:
+        cart = update_cart_item(db, current_user.id, menu_item_id, item.quantity)
+        return schemas.cart.CartResponse.from_cart(cart)
+    except Exception as e:
+        if isinstance(e, BaseCustomException):
+            raise
+        raise DatabaseException(f"Error updating cart: {str(e)}")
+
+@router.delete("/items/{menu_item_id}", response_model=schemas.cart.CartResponse)
+async def remove_item_from_cart(
+    menu_item_id: int,
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove an item from the cart.
+    Requires authentication.
+    """
+    try:
+        cart = remove_cart_item(db, current_user.id, menu_item_id)
+        return schemas.cart.CartResponse.from_cart(cart)
+    except Exception as e:
+        if isinstance(e, BaseCustomException):
+            raise
+        raise DatabaseException(f"Error updating cart: {str(e)}")
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def empty_cart(
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove every item from the cart.
+    Requires authentication.
+    """
+    try:
+        clear_cart(db, current_user.id)
+    except Exception as e:
+        raise DatabaseException(f"Error clearing cart: {str(e)}")
+
+@router.post("/checkout", response_model=schemas.orders.OrderResponse, status_code=201)
+async def checkout(
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Place an order for the contents of the cart, at the prices shown in it, and empty the cart.
+    If an item changed price or became unavailable since it was added, responds 409
+    with the changes listed and the cart updated to match; check out again to accept them.
+    Requires authentication.
+    """
+    try:
+        db_order = checkout_cart(db, current_user.id)
+        leaderboard.record_order(db_order.restaurant_id, db_order.created_at)
+        return db_order
+    except Exception as e:
+        if isinstance(e, BaseCustomException):
+            raise
+        raise DatabaseException(f"Error placing order: {str(e)}")
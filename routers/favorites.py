@@ -1,21 +1,26 @@
 # routers/favorites.py
 
-from fastapi import APIRouter, Depends
+import base64
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 
 from auth import get_current_user
 import crud
-from crud.fevorites import add_favorite, get_favorite, get_user_favorites
-from crud.restaurants import get_restaurant
-import crud.restaurants
+import crud.fevorites
+from crud.fevorites import toggle_favorite as toggle_favorite_row, get_user_favorite_restaurants
 from database import get_db
+from services.favorites import get_cached_favorite_ids, update_cached_favorite
+from services.leaderboard import leaderboard
 import schemas
 import schemas.fevorites
-import schemas.restaurants
 from exceptions import (
     RestaurantNotFoundException,
-    DatabaseException
+    DatabaseException,
+    ValidationException
 )
 
 
@@ -25,6 +30,19 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+MAX_FAVORITES_PAGE_SIZE = 100
+
+def _encode_cursor(created_at: datetime, favorite_id: int) -> str:
+    """Encodes the position of a favorite as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{favorite_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, favorite_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(favorite_id)
+    except ValueError:
+        raise ValidationException("Invalid pagination cursor", field="cursor")
+
 @router.post("/{restaurant_id}", response_model=schemas.fevorites.FavoriteResponse)
 async def toggle_favorite(
     restaurant_id: int,
@@ -34,59 +52,79 @@ async def toggle_favorite(
     """
     Toggle a restaurant as favorite/unfavorite for the authenticated user.
     If already favorited, it will be unfavorited. If not, it will be added.
+    `is_favorite` in the response tells which one happened.
     Requires authentication.
     """
     try:
-        # Check if restaurant exists
-        db_restaurant = get_restaurant(db, restaurant_id)
-        if not db_restaurant:
+        try:
+            db_favorite, is_favorite = toggle_favorite_row(db, user_id=current_user.id, restaurant_id=restaurant_id)
+        except IntegrityError:
+            # The only foreign key that can fail is the restaurant's
+            db.rollback()
             raise RestaurantNotFoundException(restaurant_id)
 
-        existing_favorite = get_favorite(db, user_id=current_user.id, restaurant_id=restaurant_id)
-
-        if existing_favorite:
-            # If exists, remove it (unfavorite)
-            crud.remove_favorite(db, user_id=current_user.id, restaurant_id=restaurant_id)
-            # Return a custom success message for unfavorite
-            return schemas.FavoriteResponse(
-                id=existing_favorite.id,
-                user_id=existing_favorite.user_id,
-                restaurant_id=existing_favorite.restaurant_id,
-                created_at=existing_favorite.created_at # Keep original creation time for response consistency
-            )
+        update_cached_favorite(current_user.id, restaurant_id, is_favorite)
+        if is_favorite:
+            leaderboard.record_favorite(restaurant_id, db_favorite.created_at)
         else:
-            # If not exists, add it (favorite)
-            new_favorite = add_favorite(db, user_id=current_user.id, restaurant_id=restaurant_id)
-            if not new_favorite:
-                raise DatabaseException("Failed to add restaurant to favorites")
-            return new_favorite
-            
+            leaderboard.remove_favorite(restaurant_id, db_favorite.created_at)
+
+        return schemas.fevorites.FavoriteResponse(
+            id=db_favorite.id,
+            user_id=db_favorite.user_id,
+            restaurant_id=db_favorite.restaurant_id,
+            created_at=db_favorite.created_at, # Original creation time when unfavorited
+            is_favorite=is_favorite
+        )
+
     except Exception as e:
         if isinstance(e, (RestaurantNotFoundException, DatabaseException)):
             raise
         raise DatabaseException(f"Error toggling favorite: {str(e)}")
 
-@router.get("/", response_model=List[schemas.restaurants.RestaurantResponse])
+@router.get("/ids", response_model=schemas.fevorites.FavoriteIdsResponse)
+async def list_my_favorite_restaurant_ids(
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the IDs of every restaurant the authenticated user has favorited,
+    for marking favorites on restaurant lists without a request per restaurant.
+    Served from a per-worker cache: a toggle handled by another worker may
+    not show up for up to FAVORITE_IDS_CACHE_TTL_SECONDS (default 5).
+    Requires authentication.
+    """
+    return schemas.fevorites.FavoriteIdsResponse(restaurant_ids=sorted(get_cached_favorite_ids(db, current_user.id)))
+
+@router.get("/", response_model=schemas.fevorites.FavoriteListResponse)
 async def list_my_favorite_restaurants(
-    skip: int = 0, limit: int = 100,
+    limit: int = Query(20, ge=1, le=MAX_FAVORITES_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: schemas.users.UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    List all favorite restaurants for the authenticated user.
+    List the authenticated user's favorite restaurants, newest first, with
+    each restaurant embedded. Pages are fetched by passing the previous
+    response's `next_cursor` as `cursor`.
     Requires authentication.
     """
+    before = _decode_cursor(cursor) if cursor else None
     try:
-        user_favorites = get_user_favorites(db, user_id=current_user.id, skip=skip, limit=limit)
-        
-        # Fetch full restaurant details for each favorite
-        favorite_restaurants = []
-        for fav in user_favorites:
-            restaurant = crud.restaurants.get_restaurant(db, fav.restaurant_id)
-            if restaurant:
-                favorite_restaurants.append(schemas.restaurants.RestaurantResponse.from_orm(restaurant))
-        
-        return favorite_restaurants
-        
+        # One extra row tells whether another page follows
+        rows = get_user_favorite_restaurants(db, user_id=current_user.id, limit=limit + 1, before=before)
     except Exception as e:
-        raise DatabaseException(f"Error retrieving favorite restaurants: {str(e)}")
\ No newline at end of file
+        raise DatabaseException(f"Error retrieving favorite restaurants: {str(e)}")
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last_favorite = page[-1][0]
+        next_cursor = _encode_cursor(last_favorite.created_at, last_favorite.id)
+    return schemas.fevorites.FavoriteListResponse(
+        items=[
+            schemas.fevorites.FavoriteRestaurantItem(favorited_at=favorite.created_at, restaurant=restaurant)
+            for favorite, restaurant in page
+        ],
+        next_cursor=next_cursor
+    )
\ No newline at end of file
@@ -1,14 +1,20 @@
 # routers/orders.py
 
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from crud.orders import create_order, get_all_orders, get_order, get_user_orders, cancel_order
+from crud.base import MAX_BATCH_IDS, get_by_ids
 import models.orders
 import schemas, crud, models
-from database import get_db
-from auth import get_current_user, get_current_admin_user
+from database import get_db, SessionLocal
+from auth import get_current_user, get_current_admin_user, decode_access_token
+from services.events import broker, order_status_event
+from services.leaderboard import leaderboard
 import schemas.orders
 import schemas.users
 from exceptions import (
@@ -18,7 +24,9 @@ from exceptions import (
     DatabaseException,
     ValidationException,
     EmptyCartException,
-    InvalidOrderStatusException
+    InvalidOrderStatusException,
+    InvalidOrderStatusTransitionException,
+    MenuVersionNotFoundException
 )
 
 router = APIRouter(
@@ -27,6 +35,9 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Seconds between keep-alive comments on idle order event streams
+EVENT_STREAM_HEARTBEAT_SECONDS = 15
+
 @router.post("/", response_model=schemas.orders.OrderResponse, status_code=201)
 async def place_order(
     order: schemas.orders.OrderCreate,
@@ -39,18 +50,19 @@ async def place_order(
     """
     try:
         # Validate order has items
-        if not hasattr(order, 'order_items') or not order.order_items:
+        if not order.items:
             raise EmptyCartException()
         
         db_order = create_order(db=db, order=order, user_id=current_user.id)
         if not db_order:
             raise DatabaseException("Failed to create order")
+        leaderboard.record_order(db_order.restaurant_id, db_order.created_at)
         return db_order
         
     except ValueError as e:
         raise ValidationException(str(e))
     except Exception as e:
-        if isinstance(e, (EmptyCartException, ValidationException, DatabaseException)):
+        if isinstance(e, (EmptyCartException, ValidationException, DatabaseException, MenuVersionNotFoundException)):
             raise
         raise DatabaseException(f"Error creating order: {str(e)}")
 
@@ -94,6 +106,118 @@ async def get_order_details(
             raise
         raise DatabaseException(f"Error retrieving order details: {str(e)}")
 
+async def _order_event_stream(request: Request, order_id: int, queue: asyncio.Queue, current: dict):
+    """Yields Server-Sent Events for an order until it reaches a final status or the client leaves."""
+    try:
+        order_event = current
+        while True:
+            yield f"event: status\ndata: {json.dumps(order_event)}\n\n"
+            if models.OrderStatus(order_event["status"]) in models.orders.TERMINAL_ORDER_STATUSES:
+                return
+            while True:
+                try:
+                    order_event = await asyncio.wait_for(queue.get(), timeout=EVENT_STREAM_HEARTBEAT_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(order_id, queue)
+
+@router.get("/{order_id}/events")
+async def stream_order_events(
+    order_id: int,
+    request: Request,
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream status changes of an order as Server-Sent Events, replacing polling of
+    GET /orders/{order_id}. The current status is sent first; the stream ends once
+    the order is delivered or cancelled.
+    Accessible by the user who placed the order or by an admin.
+    """
+    # Subscribe before reading the order so no transition can slip in between
+    queue = broker.subscribe(order_id)
+    try:
+        db_order = get_order(db, order_id=order_id)
+        if not db_order:
+            raise OrderNotFoundException(order_id)
+        if db_order.user_id != current_user.id and current_user.role != models.UserRole.ADMIN:
+            raise OrderAccessDeniedException(order_id)
+        current = order_status_event(db_order)
+    except Exception:
+        broker.unsubscribe(order_id, queue)
+        raise
+    # Give the pooled connection back; the stream may stay open for the order's lifetime
+    db.close()
+
+    return StreamingResponse(
+        _order_event_stream(request, order_id, queue, current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    """Reads and ignores client frames (e.g. application-level pings) until the client disconnects."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@router.websocket("/{order_id}/ws")
+async def order_events_websocket(
+    websocket: WebSocket,
+    order_id: int,
+    token: str = Query(..., description="JWT access token (browsers cannot set headers on WebSockets)")
+):
+    """
+    WebSocket alternative to GET /orders/{order_id}/events.
+    Sends the current status, then every status change as JSON, and closes once
+    the order is delivered or cancelled.
+    """
+    try:
+        token_data = decode_access_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    queue = broker.subscribe(order_id)
+    try:
+        db = SessionLocal()
+        try:
+            db_order = get_order(db, order_id=order_id)
+            current = order_status_event(db_order) if db_order else None
+        finally:
+            db.close()
+        if current is None or (current["user_id"] != token_data.user_id and token_data.role != models.UserRole.ADMIN):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        await websocket.accept()
+        order_event = current
+        # Clients only listen; anything they send is ignored
+        disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+        try:
+            while True:
+                await websocket.send_json(order_event)
+                if models.OrderStatus(order_event["status"]) in models.orders.TERMINAL_ORDER_STATUSES:
+                    break
+                next_event = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    next_event.cancel()
+                    return
+                order_event = next_event.result()
+            await websocket.close()
+        finally:
+            disconnected.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(order_id, queue)
+
 @router.put("/{order_id}/cancel", response_model=schemas.orders.OrderResponse)
 async def cancel_order_endpoint(
     order_id: int,
@@ -105,21 +229,17 @@ async def cancel_order_endpoint(
     Accessible only by the user who placed the order.
     """
     try:
+        cancelled_order = crud.orders.cancel_order(db, order_id=order_id, user_id=current_user.id)
+        if cancelled_order:
+            return cancelled_order
+
+        # Nothing was updated: look the order up only to report why
         db_order = get_order(db, order_id=order_id)
         if not db_order:
             raise OrderNotFoundException(order_id)
-        
         if db_order.user_id != current_user.id:
             raise OrderAccessDeniedException(order_id)
-        
-        if db_order.status != models.OrderStatus.PENDING:
-            raise OrderNotCancellableException(order_id, db_order.status.value)
-
-        cancelled_order = crud.orders.cancel_order(db, order_id=order_id)
-        if not cancelled_order:
-            raise DatabaseException("Failed to cancel order")
-        
-        return cancelled_order
+        raise OrderNotCancellableException(order_id, db_order.status.value)
         
     except Exception as e:
         if isinstance(e, (OrderNotFoundException, OrderAccessDeniedException, OrderNotCancellableException, DatabaseException)):
@@ -129,14 +249,19 @@ async def cancel_order_endpoint(
 @router.get("/admin/", response_model=List[schemas.orders.OrderResponse])
 async def admin_view_all_orders(
     skip: int = 0, limit: int = 100,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_BATCH_IDS, description="Fetch only these orders, e.g. ?ids=42&ids=17"),
     current_admin_user: schemas.users.UserResponse = Depends(get_current_admin_user), # Admin only
     db: Session = Depends(get_db)
 ):
     """
     Admin view of all orders.
+    With `ids`, retrieve exactly those orders in one query, in the order
+    requested; unknown IDs are left out.
     Requires admin authentication.
     """
     try:
+        if ids is not None:
+            return get_by_ids(db, models.orders.Order, ids)
         orders = get_all_orders(db, skip=skip, limit=limit)
         return orders
     except Exception as e:
@@ -151,22 +276,21 @@ async def update_order_status(
 ):
     """
     Admin updates an order's status.
+    Allowed transitions: pending -> confirmed -> delivered, pending -> cancelled.
     Requires admin authentication.
     """
     try:
-        # Validate status transition logic (optional enhancement)
+        updated_order = crud.orders.update_order_status(db, order_id, new_status)
+        if updated_order:
+            return updated_order
+
+        # Nothing was updated: look the order up only to report why
         db_order = get_order(db, order_id=order_id)
         if not db_order:
             raise OrderNotFoundException(order_id)
-        
-        # Update order status
-        updated_order = crud.orders.update_order_status(db, order_id, new_status)
-        if not updated_order:
-            raise DatabaseException("Failed to update order status")
-            
-        return updated_order
+        raise InvalidOrderStatusTransitionException(order_id, db_order.status.value, new_status.value)
         
     except Exception as e:
-        if isinstance(e, (OrderNotFoundException, InvalidOrderStatusException, DatabaseException)):
+        if isinstance(e, (OrderNotFoundException, InvalidOrderStatusException, InvalidOrderStatusTransitionException, DatabaseException)):
             raise
         raise DatabaseException(f"Error updating order status: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,53 @@
+# routers/reports.py
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from auth import get_current_admin_user
+from crud.restaurants import get_restaurant
+from database import get_read_db
+import schemas.reports
+import schemas.users
+
+# Import custom exceptions
+from exceptions import RestaurantNotFoundException
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["Reports"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/restaurants/{restaurant_id}", response_model=schemas.reports.RestaurantReportResponse)
+def read_restaurant_report(
+    restaurant_id: int,
+    period: schemas.reports.ReportPeriod = schemas.reports.ReportPeriod.WEEK,
+    refresh: bool = Query(False, description="Recompute the report instead of serving the cached copy"),
+    current_admin_user: schemas.users.UserResponse = Depends(get_current_admin_user), # Admin only
+    db: Session = Depends(get_read_db)
+):
+    """
+    Restaurant and menu performance report: per-dish sales, dishes frequently
+    ordered together and time-of-day demand over the last day, week or month.
+    Results are cached per restaurant and period.
+    Requires admin authentication.
+    """
+    # Imported on first use: the report engine pulls in numpy, which would slow every worker's startup
+    from services.reports import get_restaurant_report
+
+    if not get_restaurant(db, restaurant_id):
+        raise RestaurantNotFoundException(restaurant_id)
+    return get_restaurant_report(db, restaurant_id, period, refresh=refresh)
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+def clear_reports_cache(
+    current_admin_user: schemas.users.UserResponse = Depends(get_current_admin_user), # Admin only
+):
+    """
+    Drop all cached reports.
+    Requires admin authentication.
+    """
+    from services.reports import clear_report_cache
+
+    clear_report_cache()
+    return
@@ -1,23 +1,36 @@
 # routers/restaurants.py
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Path, Query, Request, Response, status
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import schemas, crud, models
-from database import get_db
+from database import get_db, get_read_db
 from auth import get_current_user, get_current_admin_user
 import schemas.menu
 import schemas.restaurants
+import schemas.reviews
 import schemas.users
-from crud.restaurants import get_restaurant, get_restaurants, delete_restaurant, update_restaurant
+from crud.restaurants import (
+    get_restaurant, get_restaurants, delete_restaurant, update_restaurant,
+    get_restaurants_with_relations
+)
+from crud.base import MAX_BATCH_IDS, get_by_ids
+from crud.loaders import RequestLoaders
 from crud.menu import create_menu_item, get_menu_items_by_restaurant
+from crud.recommendations import get_similar_restaurants
+from services.leaderboard import leaderboard
+from services.menu_versions import get_menu_snapshot
+from conditional import conditional_response, immutable_not_modified, immutable_response
 
 # Import custom exceptions
 from exceptions import (
     RestaurantNotFoundException,
     MenuItemNotFoundException,
-    RestaurantInactiveException
+    MenuVersionNotFoundException,
+    RestaurantInactiveException,
+    ValidationException
 )
 
 router = APIRouter(
@@ -26,13 +39,93 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/", response_model=List[schemas.restaurants.RestaurantResponse])
-def read_restaurants(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+# Restaurant columns selectable with fields= and relations embeddable with include=
+RESTAURANT_FIELDS = ("name", "address", "phone", "cuisine", "opening_hours", "is_active", "rating", "menu_version", "created_at", "updated_at")
+RESTAURANT_INCLUDES = ("menu", "reviews", "favorite_count")
+LATEST_REVIEWS_PER_RESTAURANT = 10
+
+FIELDS_DESCRIPTION = f"Comma-separated restaurant fields to return (id is always returned): {', '.join(RESTAURANT_FIELDS)}"
+INCLUDE_DESCRIPTION = f"Comma-separated relations to embed: {', '.join(RESTAURANT_INCLUDES)} (latest {LATEST_REVIEWS_PER_RESTAURANT} reviews)"
+
+def _parse_names(value: Optional[str], allowed: tuple, parameter: str) -> Optional[List[str]]:
+    """Splits a comma-separated query parameter and rejects names that are not allowed."""
+    if value is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValidationException(f"Unknown {parameter}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}", field=parameter)
+    return names
+
+def _read_shaped_restaurants(
+    db: Session,
+    fields: Optional[str],
+    include: Optional[str],
+    restaurant_ids: Optional[List[int]] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> Tuple[List[schemas.restaurants.RestaurantDetailResponse], list, list]:
+    """
+    Loads restaurants with only the requested columns and relations and builds their responses.
+    Also returns the rows they were built from and their favorite counts, for conditional requests.
+    """
+    columns = _parse_names(fields, RESTAURANT_FIELDS, "fields")
+    includes = set(_parse_names(include, RESTAURANT_INCLUDES, "include") or [])
+    # The timestamps are always loaded: they version the response
+    loaded_columns = None if columns is None else list(dict.fromkeys(columns + ["created_at", "updated_at"]))
+
+    rows = get_restaurants_with_relations(
+        db, restaurant_ids=restaurant_ids, skip=skip, limit=limit, columns=loaded_columns,
+        include_favorite_count="favorite_count" in includes
+    )
+    # Menus and reviews of the whole page are each fetched in one query
+    loaders = RequestLoaders(db, reviews_per_restaurant=LATEST_REVIEWS_PER_RESTAURANT)
+    page_ids = [restaurant.id for restaurant, _ in rows]
+    if "menu" in includes:
+        loaders.menu_items_by_restaurant.load_many(page_ids)
+    if "reviews" in includes:
+        loaders.latest_reviews_by_restaurant.load_many(page_ids)
+
+    shaped, versioned_rows, favorite_counts = [], [], []
+    for restaurant, favorite_count in rows:
+        versioned_rows.append(restaurant)
+        data = {"id": restaurant.id}
+        for column in (columns if columns is not None else RESTAURANT_FIELDS):
+            data[column] = getattr(restaurant, column)
+        if "menu" in includes:
+            menu_items = loaders.menu_items_by_restaurant.load(restaurant.id)
+            data["menu_items"] = [schemas.menu.MenuItemResponse.from_orm(item) for item in menu_items]
+            versioned_rows.extend(menu_items)
+        if "reviews" in includes:
+            latest_reviews = loaders.latest_reviews_by_restaurant.load(restaurant.id)
+            data["reviews"] = [schemas.reviews.ReviewResponse.from_orm(review) for review in latest_reviews]
+            versioned_rows.extend(latest_reviews)
+        if "favorite_count" in includes:
+            data["favorite_count"] = favorite_count
+            favorite_counts.append(favorite_count)
+        shaped.append(schemas.restaurants.RestaurantDetailResponse(**data))
+    return shaped, versioned_rows, favorite_counts
+
+@router.get("/", response_model=List[schemas.restaurants.RestaurantDetailResponse], response_model_exclude_unset=True)
+def read_restaurants(
+    request: Request,
+    response: Response,
+    skip: int = 0, limit: int = 100,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_BATCH_IDS, description="Fetch only these restaurants, e.g. ?ids=3&ids=1"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """
     Retrieve a list of all restaurants.
+    With `ids`, retrieve exactly those restaurants in one query, in the order
+    requested; unknown IDs are left out.
+    - **fields**: return only these fields, e.g. `fields=name,rating`.
+    - **include**: embed relations, e.g. `include=menu,reviews,favorite_count`.
+    Supports If-None-Match / If-Modified-Since: 304 when nothing returned has changed.
     """
-    restaurants = get_restaurants(db, skip=skip, limit=limit)
-    return restaurants
+    shaped, versioned_rows, favorite_counts = _read_shaped_restaurants(db, fields, include, restaurant_ids=ids, skip=skip, limit=limit)
+    return conditional_response(request, response, versioned_rows, favorite_counts) or shaped
 
 @router.post("/", response_model=schemas.restaurants.RestaurantResponse, status_code=status.HTTP_201_CREATED)
 def create_restaurant(
@@ -47,15 +140,80 @@ def create_restaurant(
     # You might want to add a check here if a restaurant with the same name/address already exists
     return crud.restaurants.create_restaurant(db=db, restaurant=restaurant)
 
-@router.get("/{restaurant_id}", response_model=schemas.restaurants.RestaurantResponse)
-def read_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
+@router.get("/trending", response_model=List[schemas.restaurants.TrendingRestaurantResponse])
+def read_trending_restaurants(limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_read_db)):
+    """
+    Retrieve the currently trending active restaurants, ranked by recent orders
+    and favorites with older activity counting progressively less.
+    """
+    leaderboard.refresh(db)
+    # Inactive restaurants are skipped, so fetch more of the ranking until the page is full
+    fetch = limit
+    while True:
+        ranked = leaderboard.top(fetch)
+        active = [
+            restaurant for restaurant in get_by_ids(db, models.restaurants.Restaurant, [restaurant_id for restaurant_id, _ in ranked])
+            if restaurant.is_active
+        ]
+        if len(active) >= limit or len(ranked) < fetch:
+            break
+        fetch *= 2
+    scores = dict(ranked)
+    return [
+        schemas.restaurants.TrendingRestaurantResponse(
+            **schemas.restaurants.RestaurantResponse.from_orm(restaurant).model_dump(),
+            trending_score=scores[restaurant.id]
+        )
+        for restaurant in active[:limit]
+    ]
+
+@router.get("/menu-items", response_model=List[schemas.menu.MenuItemResponse])
+def read_menu_items_by_ids(
+    ids: List[int] = Query(..., max_length=MAX_BATCH_IDS, description="Menu item IDs, e.g. ?ids=12&ids=7"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Retrieve several menu items, from any restaurants, in one query.
+    Items are returned in the order requested; unknown IDs are left out.
+    """
+    return get_by_ids(db, models.menu.MenuItem, ids)
+
+@router.get("/{restaurant_id}", response_model=schemas.restaurants.RestaurantDetailResponse, response_model_exclude_unset=True)
+def read_restaurant(
+    restaurant_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """
     Retrieve details of a specific restaurant by ID.
+    - **fields**: return only these fields, e.g. `fields=name,rating`.
+    - **include**: embed relations, e.g. `include=menu,reviews,favorite_count`,
+      instead of separate menu and review requests.
+    Supports If-None-Match / If-Modified-Since: 304 when nothing returned has changed.
     """
-    db_restaurant = get_restaurant(db, restaurant_id=restaurant_id)
-    if db_restaurant is None:
+    shaped, versioned_rows, favorite_counts = _read_shaped_restaurants(db, fields, include, restaurant_ids=[restaurant_id])
+    if not shaped:
         raise RestaurantNotFoundException(restaurant_id)
-    return db_restaurant
+    return conditional_response(request, response, versioned_rows, favorite_counts) or shaped[0]
+
+@router.get("/{restaurant_id}/similar", response_model=List[schemas.restaurants.RecommendedRestaurantResponse])
+def read_similar_restaurants(restaurant_id: int, limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_read_db)):
+    """
+    Retrieve restaurants liked by the same customers as this one.
+    Served from the precomputed similarity table (see jobs/recommendations.py).
+    """
+    similar = get_similar_restaurants(db, restaurant_id=restaurant_id, limit=limit)
+    if not similar and not get_restaurant(db, restaurant_id):
+        raise RestaurantNotFoundException(restaurant_id)
+    return [
+        schemas.restaurants.RecommendedRestaurantResponse(
+            **schemas.restaurants.RestaurantResponse.from_orm(restaurant).model_dump(), score=score
+        )
+        for restaurant, score in similar
+    ]
 
 @router.put("/{restaurant_id}", response_model=schemas.restaurants.RestaurantResponse)
 def update_restaurant_endpoint(
@@ -91,15 +249,56 @@ def delete_restaurant_endpoint(
 # --- Menu Item Endpoints (Admin only for POST, PUT, DELETE) ---
 
 @router.get("/{restaurant_id}/menu/", response_model=List[schemas.menu.MenuItemResponse])
-def read_menu_items_for_restaurant(restaurant_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_menu_items_for_restaurant(
+    restaurant_id: int, request: Request, response: Response,
+    skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)
+):
     """
     Retrieve all menu items for a specific restaurant.
+    Supports If-None-Match / If-Modified-Since: 304 when no item has changed.
     """
     db_restaurant = get_restaurant(db, restaurant_id)
     if not db_restaurant:
         raise RestaurantNotFoundException(restaurant_id)
     menu_items = get_menu_items_by_restaurant(db, restaurant_id=restaurant_id, skip=skip, limit=limit)
-    return menu_items
+    return conditional_response(request, response, menu_items) or menu_items
+
+@router.get("/{restaurant_id}/menu/versions/latest", status_code=status.HTTP_307_TEMPORARY_REDIRECT, response_class=RedirectResponse)
+def read_latest_menu_version(restaurant_id: int, db: Session = Depends(get_read_db)):
+    """
+    Redirect to the restaurant's current menu version.
+    Clients that already have the restaurant's `menu_version` can skip this and
+    request the version directly.
+    """
+    db_restaurant = get_restaurant(db, restaurant_id)
+    if not db_restaurant:
+        raise RestaurantNotFoundException(restaurant_id)
+    return RedirectResponse(
+        f"{router.prefix}/{restaurant_id}/menu/versions/{db_restaurant.menu_version}",
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/{restaurant_id}/menu/versions/{version}", response_model=schemas.menu.MenuVersionResponse)
+def read_menu_version(
+    restaurant_id: int, request: Request,
+    version: int = Path(..., ge=0), db: Session = Depends(get_read_db)
+):
+    """
+    Retrieve a published version of a restaurant's menu; the current one is the
+    restaurant's `menu_version`. A version never changes once published, so it is
+    served pre-rendered with `Cache-Control: immutable` and may be cached by
+    clients and CDNs indefinitely.
+    """
+    etag = f'"menu-{restaurant_id}-{version}"'
+    # The ETag names the document, so a match needs no lookup
+    not_modified = immutable_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    menu_snapshot = get_menu_snapshot(db, restaurant_id, version)
+    if menu_snapshot is None:
+        raise MenuVersionNotFoundException(restaurant_id, version)
+    return immutable_response(etag, menu_snapshot.body)
 
 @router.post("/{restaurant_id}/menu/", response_model=schemas.menu.MenuItemResponse, status_code=status.HTTP_201_CREATED)
 def create_menu_item_for_restaurant(
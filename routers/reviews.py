@@ -1,14 +1,19 @@
 # routers/reviews.py
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 
 from auth import get_current_user
 import crud.restaurants
-from crud.reviews import create_review, get_review, get_reviews_by_restaurant
+from crud.reviews import (
+    create_review, get_review, get_reviews_by_restaurant, get_review_eligibility,
+    get_review_stats, count_recent_reviews
+)
 import crud.reviews
-from database import get_db
+from database import get_db, get_read_db
+from conditional import conditional_response
 import schemas, crud, models
 import schemas.reviews
 
@@ -27,6 +32,9 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Window for recent_count in review summaries
+RECENT_REVIEWS_DAYS = 30
+
 @router.post("/", response_model=schemas.reviews.ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def add_review(
     review: schemas.reviews.ReviewCreate,
@@ -38,28 +46,19 @@ async def add_review(
     Only for completed orders.
     Requires authentication.
     """
-    # Check if the user has a completed order for this restaurant
-    # This is a crucial "bonus requirement" check.
-    # It requires iterating through user's orders to find a matching, completed order.
-    user_completed_orders = db.query(models.Order).filter(
-        models.Order.user_id == current_user.id,
-        models.Order.restaurant_id == review.restaurant_id,
-        models.Order.status == models.OrderStatus.DELIVERED # Only delivered orders can be reviewed
-    ).first()
-
-    if not user_completed_orders:
+    # Only delivered orders can be reviewed, once per restaurant; both checked in one query
+    has_delivered_order, has_reviewed = get_review_eligibility(db, user_id=current_user.id, restaurant_id=review.restaurant_id)
+    if not has_delivered_order:
         raise ReviewNotAllowedException(review.restaurant_id)
-
-    # Check if the user has already reviewed this restaurant (optional: prevent multiple reviews per user per restaurant)
-    existing_review = db.query(models.Review).filter(
-        models.Review.user_id == current_user.id,
-        models.Review.restaurant_id == review.restaurant_id
-    ).first()
-    
-    if existing_review:
+    if has_reviewed:
         raise ReviewAlreadyExistsException(review.restaurant_id)
 
-    db_review = create_review(db=db, review=review, user_id=current_user.id)
+    try:
+        db_review = create_review(db=db, review=review, user_id=current_user.id)
+    except IntegrityError:
+        # A concurrent submission got in first; the unique constraint rejected this one
+        db.rollback()
+        raise ReviewAlreadyExistsException(review.restaurant_id)
     
     # Optional: Update restaurant's average rating
     # This would involve recalculating the average rating for the restaurant after each new review.
@@ -67,15 +66,40 @@ async def add_review(
     
     return db_review
 
+@router.get("/restaurant/{restaurant_id}/summary", response_model=schemas.reviews.ReviewSummaryResponse)
+def get_review_summary_for_restaurant(restaurant_id: int, db: Session = Depends(get_read_db)):
+    """
+    Get the average rating, review count, 1-5 star histogram and number of
+    recent reviews of a restaurant, without downloading its reviews.
+    """
+    stats = get_review_stats(db, restaurant_id)
+    if stats is None and not crud.restaurants.get_restaurant(db, restaurant_id):
+        raise RestaurantNotFoundException(restaurant_id)
+
+    review_count = stats.review_count if stats else 0
+    return schemas.reviews.ReviewSummaryResponse(
+        restaurant_id=restaurant_id,
+        review_count=review_count,
+        average_rating=round(stats.rating_total / review_count, 2) if review_count else None,
+        histogram={stars: getattr(stats, f"stars_{stars}") if stats else 0 for stars in range(1, 6)},
+        recent_count=count_recent_reviews(db, restaurant_id, days=RECENT_REVIEWS_DAYS) if review_count else 0,
+        recent_days=RECENT_REVIEWS_DAYS
+    )
+
 @router.get("/restaurant/{restaurant_id}", response_model=List[schemas.reviews.ReviewResponse])
-def get_reviews_for_restaurant(restaurant_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_reviews_for_restaurant(
+    restaurant_id: int, request: Request, response: Response, skip: int = 0, limit: int = 100,
+    sort: schemas.reviews.ReviewSort = Query(schemas.reviews.ReviewSort.RECENT, description="recent, highest or lowest rated first"),
+    db: Session = Depends(get_read_db)
+):
     """
     Get all reviews for a specific restaurant.
+    Supports If-None-Match / If-Modified-Since: 304 when no review has changed.
     """
-    reviews = get_reviews_by_restaurant(db, restaurant_id=restaurant_id, skip=skip, limit=limit)
+    reviews = get_reviews_by_restaurant(db, restaurant_id=restaurant_id, skip=skip, limit=limit, sort=sort)
     if not reviews and not crud.restaurants.get_restaurant(db, restaurant_id):
         raise RestaurantNotFoundException(restaurant_id)
-    return reviews
+    return conditional_response(request, response, reviews) or reviews
 
 @router.put("/{review_id}", response_model=schemas.reviews.ReviewResponse)
 async def update_review(
@@ -95,7 +119,9 @@ async def update_review(
     if db_review.user_id != current_user.id:
         raise ReviewAccessDeniedException(review_id)
     
-    updated_review = crud.reviews.update_review(db, review_id=review_id, review_update=review_update)
+    updated_review = crud.reviews.update_review(db, db_review=db_review, review_update=review_update)
+    if updated_review is None:
+        raise ReviewNotFoundException(review_id)
     return updated_review
 
 @router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -115,8 +141,6 @@ async def delete_review(
     if db_review.user_id != current_user.id and current_user.role != models.UserRole.ADMIN:
         raise ReviewAccessDeniedException(review_id)
     
-    success = crud.reviews.delete_review(db, review_id=review_id)
-    if not success:
-        # This should not happen if db_review was found, but handle it gracefully
+    if not crud.reviews.delete_review(db, db_review=db_review):
         raise ReviewNotFoundException(review_id)
     return
@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import get_db
+from database import get_read_db
 from schemas.menu import MenuItemResponse
 from schemas.restaurants import RestaurantResponse
 from crud.search import search_restaurants_and_dishes as crud_search
@@ -29,7 +29,7 @@ def search_endpoint(
     is_active: Optional[bool] = Query(True, description="Filter restaurants by active status"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Search restaurants and dishes by keyword and apply various filters.
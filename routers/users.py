@@ -1,15 +1,16 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from typing import List
 from crud import users as crud
-from database import get_db
+from crud.recommendations import get_user_recommendations
+from database import get_db, get_read_db
 from auth import verify_password, create_access_token, get_current_user, get_current_admin_user
 from datetime import timedelta
-import os
-from dotenv import load_dotenv
+from settings import settings
 import models
 import schemas
+import schemas.restaurants
 import schemas.users
 
 # Import custom exceptions
@@ -20,9 +21,7 @@ from exceptions import (
     AuthenticationException
 )
 
-load_dotenv()
-
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 # Initialize HTTPBearer security scheme
 security = HTTPBearer()
@@ -91,6 +90,24 @@ async def update_users_me(
         raise UserNotFoundException(user_id=current_user.id)
     return db_user
 
+@router.get("/me/recommendations", response_model=List[schemas.restaurants.RecommendedRestaurantResponse])
+async def read_my_recommendations(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: schemas.users.UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Recommend restaurants similar to the ones the authenticated user has favorited
+    or received orders from. Empty until the user has interacted with a restaurant.
+    Requires authentication.
+    """
+    return [
+        schemas.restaurants.RecommendedRestaurantResponse(
+            **schemas.restaurants.RestaurantResponse.from_orm(restaurant).model_dump(), score=score
+        )
+        for restaurant, score in get_user_recommendations(db, user_id=current_user.id, limit=limit)
+    ]
+
 @router.get("/", response_model=List[schemas.users.UserResponse])
 async def get_all_users(
     skip: int = 0, limit: int = 100,
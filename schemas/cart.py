@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+# --- Cart Schemas ---
+class CartItemAdd(BaseModel):
+    """Schema for adding a menu item to the cart."""
+    menu_item_id: int
+    quantity: int = Field(1, gt=0)
+
+class CartItemUpdate(BaseModel):
+    """Schema for changing the quantity of a cart line."""
+    quantity: int = Field(..., gt=0)
+
+class CartItemResponse(BaseModel):
+    """Schema for one cart line, at the price it was last validated at."""
+    menu_item_id: int
+    name: str
+    quantity: int
+    unit_price: float
+    line_total: float
+
+class CartResponse(BaseModel):
+    """Schema for the cart returned in API responses."""
+    restaurant_id: Optional[int] = None # Every line comes from this restaurant
+    items: List[CartItemResponse] = []
+    total_price: float = 0.0
+    expires_at: Optional[datetime] = None
+
+    @classmethod
+    def from_cart(cls, cart: dict) -> "CartResponse":
+        items = [CartItemResponse(**line, line_total=line["unit_price"] * line["quantity"]) for line in cart["items"]]
+        return cls(
+            restaurant_id=cart["restaurant_id"],
+            items=items,
+            total_price=sum(item.line_total for item in items),
+            expires_at=cart["expires_at"]
+        )
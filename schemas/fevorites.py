@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from schemas.restaurants import RestaurantResponse
 
 # --- Favorite Schemas ---
 class FavoriteCreate(BaseModel):
@@ -14,6 +15,21 @@ class FavoriteResponse(BaseModel):
     user_id: int
     restaurant_id: int
     created_at: datetime
+    is_favorite: bool = True # False when the toggle removed the favorite
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FavoriteRestaurantItem(BaseModel):
+    """Schema for one favorite with its restaurant embedded."""
+    favorited_at: datetime
+    restaurant: RestaurantResponse
+
+class FavoriteListResponse(BaseModel):
+    """Schema for a page of the user's favorites, newest first."""
+    items: List[FavoriteRestaurantItem]
+    next_cursor: Optional[str] = None # Pass as `cursor` to fetch the next page; None on the last page
+
+class FavoriteIdsResponse(BaseModel):
+    """Schema for the IDs of every restaurant the user has favorited."""
+    restaurant_ids: List[int]
\ No newline at end of file
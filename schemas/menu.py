@@ -32,4 +32,10 @@ class MenuItemResponse(MenuItemBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MenuVersionResponse(BaseModel):
+    """Schema for a published menu version, an immutable snapshot of the whole menu."""
+    restaurant_id: int
+    version: int
+    items: List[MenuItemResponse]
\ No newline at end of file
@@ -34,6 +34,7 @@ class OrderResponse(BaseModel):
     items: List[Dict[str, Any]] # Will be parsed from JSON (list of dicts)
     status: OrderStatus
     total_price: float
+    menu_version: Optional[int] = None # Menu version the order was priced from
     created_at: datetime
     updated_at: Optional[datetime] = None
 
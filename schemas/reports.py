@@ -0,0 +1,42 @@
+import enum
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+# Define Enum for report periods
+class ReportPeriod(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+# --- Report Schemas ---
+class DishSales(BaseModel):
+    """Sales figures for a single menu item over the report period."""
+    menu_item_id: int
+    name: Optional[str] = None # None if the menu item has since been deleted
+    quantity: int
+    revenue: float
+    order_count: int
+
+class ItemPair(BaseModel):
+    """Two menu items that are frequently ordered together."""
+    menu_item_ids: List[int]
+    names: List[Optional[str]]
+    order_count: int
+
+class HourlyDemand(BaseModel):
+    """Orders and revenue for one hour of the day (UTC)."""
+    hour: int
+    order_count: int
+    revenue: float
+
+class RestaurantReportResponse(BaseModel):
+    """Schema for the restaurant and menu performance report."""
+    restaurant_id: int
+    period: ReportPeriod
+    generated_at: datetime
+    order_count: int
+    revenue: float
+    dish_sales: List[DishSales]
+    top_pairs: List[ItemPair]
+    hourly_demand: List[HourlyDemand]
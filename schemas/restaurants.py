@@ -2,6 +2,9 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+from schemas.menu import MenuItemResponse
+from schemas.reviews import ReviewResponse
+
 # --- Restaurant Schemas ---
 class RestaurantBase(BaseModel):
     """Base schema for restaurant properties."""
@@ -31,8 +34,38 @@ class RestaurantResponse(RestaurantBase):
     """Schema for restaurant data returned in API responses."""
     id: int
     rating: float
+    menu_version: int = 0 # Fetch the menu, cacheable indefinitely, at GET /restaurants/{id}/menu/versions/{menu_version}
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TrendingRestaurantResponse(RestaurantResponse):
+    """Schema for a restaurant on the trending leaderboard."""
+    trending_score: float # Time-decayed orders and favorites
+
+class RecommendedRestaurantResponse(RestaurantResponse):
+    """Schema for a restaurant returned by similarity-based recommendations."""
+    score: float # Higher is more similar
+
+class RestaurantDetailResponse(BaseModel):
+    """
+    Schema for restaurant reads shaped by the `fields` and `include` query parameters.
+    Only the requested keys are returned; without parameters it matches RestaurantResponse.
+    """
+    id: int
+    name: Optional[str] = None
+    address: Optional[str] = None
+    phone: Optional[str] = None
+    cuisine: Optional[str] = None
+    opening_hours: Optional[str] = None
+    is_active: Optional[bool] = None
+    rating: Optional[float] = None
+    menu_version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    # Embedded relations, only present when asked for with include=
+    menu_items: Optional[List[MenuItemResponse]] = None
+    reviews: Optional[List[ReviewResponse]] = None # Latest reviews first
+    favorite_count: Optional[int] = None
\ No newline at end of file
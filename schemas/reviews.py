@@ -1,7 +1,14 @@
+import enum
 from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+# Define Enum for review listing order
+class ReviewSort(str, enum.Enum):
+    RECENT = "recent"
+    HIGHEST = "highest"
+    LOWEST = "lowest"
+
 # --- Review Schemas ---
 class ReviewBase(BaseModel):
     """Base schema for review properties."""
@@ -26,4 +33,13 @@ class ReviewResponse(ReviewBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ReviewSummaryResponse(BaseModel):
+    """Schema for the aggregated reviews of a restaurant."""
+    restaurant_id: int
+    review_count: int
+    average_rating: Optional[float] = None # None without reviews
+    histogram: Dict[int, int] # Star rating (1-5) -> number of reviews
+    recent_count: int # Reviews in the last recent_days days
+    recent_days: int
@@ -0,0 +1,267 @@
+# services/cart.py
+#
+# Server-side carts. Every change validates only the menu item it touches
+# (exists, available, restaurant active, current price) against the
+# restaurant's published menu version (services/menu_versions.py) and stores
+# a priced snapshot of the line, along with the menu version every line
+# matches. Checkout is then a cheap commit: if the restaurant's menu version
+# is still the cart's, nothing can have changed and the order is inserted
+# as is; otherwise the lines are compared with the current version, which is
+# cached per worker. No menu rows are loaded at the moment the database is
+# busiest.
+#
+# Carts are kept by the backend chosen with CART_BACKEND:
+# - "postgres" (default): the carts table, shared by every worker and instance.
+#   Changes lock the user's row, so concurrent edits and double-submitted
+#   checkouts of one cart are serialized, and checkout deletes the cart in the
+#   transaction that inserts the order.
+# - "memory": a TTLCache in this worker process, for development and
+#   single-process deployments. Writes are applied when the session commits.
+# A cart expires CART_TTL_SECONDS after its last change.
+
+import copy
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from crud.carts import get_cart, upsert_cart, delete_cart, delete_expired_carts
+from crud.menu import get_menu_item
+from crud.orders import create_order_from_cart
+from crud.restaurants import get_restaurant
+from database import SessionLocal
+from exceptions import (
+    CartChangedException,
+    CartItemNotFoundException,
+    CartRestaurantMismatchException,
+    EmptyCartException,
+    MenuItemNotFoundException,
+    MenuItemUnavailableException,
+    RestaurantInactiveException,
+    RestaurantNotFoundException
+)
+from services.menu_versions import MenuSnapshot, get_current_menu_snapshot
+from settings import settings
+
+CART_BACKEND = settings.cart_backend
+CART_TTL_SECONDS = settings.cart_ttl_seconds
+CART_CACHE_SIZE = 100_000
+
+_PENDING_CART_WRITES_KEY = "pending_cart_writes"
+
+
+def empty_cart() -> dict:
+    return {"restaurant_id": None, "items": [], "menu_version": None, "expires_at": None}
+
+
+class InMemoryCartBackend:
+    """
+    Carts held by the current worker process. Writes are queued on the session
+    and applied once it commits, like the other backend's; concurrent changes
+    to one cart are not serialized.
+    """
+
+    def __init__(self, ttl_seconds: int = CART_TTL_SECONDS, max_carts: int = CART_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self._carts: TTLCache = TTLCache(maxsize=max_carts, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, user_id: int, for_update: bool = False) -> Optional[dict]:
+        with self._lock:
+            cart = self._carts.get(user_id)
+        return copy.deepcopy(cart)
+
+    def save(self, db: Session, user_id: int, cart: dict):
+        cart["expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        db.info.setdefault(_PENDING_CART_WRITES_KEY, {})[user_id] = copy.deepcopy(cart)
+
+    def delete(self, db: Session, user_id: int):
+        db.info.setdefault(_PENDING_CART_WRITES_KEY, {})[user_id] = None
+
+    def apply(self, writes: dict):
+        with self._lock:
+            for user_id, cart in writes.items():
+                if cart is None:
+                    self._carts.pop(user_id, None)
+                else:
+                    self._carts[user_id] = cart
+
+
+class PostgresCartBackend:
+    """Carts in the carts table. Writes join the session's transaction."""
+
+    PRUNE_INTERVAL_SECONDS = 300
+
+    def __init__(self, ttl_seconds: int = CART_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._pruned_at = 0.0
+
+    def load(self, db: Session, user_id: int, for_update: bool = False) -> Optional[dict]:
+        db_cart = get_cart(db, user_id, for_update=for_update)
+        if db_cart is None or not db_cart.items or db_cart.expires_at <= datetime.now(timezone.utc):
+            return None
+        return {
+            "restaurant_id": db_cart.restaurant_id,
+            "items": copy.deepcopy(db_cart.items),
+            "menu_version": db_cart.menu_version,
+            "expires_at": db_cart.expires_at
+        }
+
+    def save(self, db: Session, user_id: int, cart: dict):
+        cart["expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        upsert_cart(db, user_id, cart["restaurant_id"], cart["items"], cart["menu_version"], cart["expires_at"])
+        if time.monotonic() - self._pruned_at > self.PRUNE_INTERVAL_SECONDS:
+            self._pruned_at = time.monotonic()
+            delete_expired_carts(db)
+
+    def delete(self, db: Session, user_id: int):
+        delete_cart(db, user_id)
+
+
+cart_store = PostgresCartBackend() if CART_BACKEND == "postgres" else InMemoryCartBackend()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed_cart_writes(session: Session):
+    writes = session.info.pop(_PENDING_CART_WRITES_KEY, None)
+    if writes:
+        cart_store.apply(writes)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_cart_writes(session: Session):
+    session.info.pop(_PENDING_CART_WRITES_KEY, None)
+
+
+def _compare_with_menu(lines: list, menu_snapshot: MenuSnapshot):
+    """
+    Reprices cart lines at a menu version.
+    Returns the changes found and the lines that are still available, repriced.
+    """
+    changes, current_lines = [], []
+    for line in lines:
+        menu_item = menu_snapshot.items.get(line["menu_item_id"])
+        if menu_item is None or not menu_item["is_available"]:
+            changes.append({"menu_item_id": line["menu_item_id"], "name": line["name"], "change": "unavailable"})
+            continue
+        if menu_item["price"] != line["unit_price"]:
+            changes.append({
+                "menu_item_id": line["menu_item_id"], "name": line["name"], "change": "price",
+                "old_price": line["unit_price"], "new_price": menu_item["price"]
+            })
+        current_lines.append({**line, "name": menu_item["name"], "unit_price": menu_item["price"]})
+    return changes, current_lines
+
+
+def _set_line(db: Session, cart: dict, menu_item_id: int, quantity: int):
+    """
+    Validates a menu item against the cart and the restaurant's current menu
+    version, then adds or replaces its line at the current price.
+    """
+    menu_item = get_menu_item(db, menu_item_id)
+    if menu_item is None:
+        raise MenuItemNotFoundException(menu_item_id)
+    if cart["items"] and cart["restaurant_id"] != menu_item.restaurant_id:
+        raise CartRestaurantMismatchException(cart["restaurant_id"], menu_item.restaurant_id)
+    restaurant = get_restaurant(db, menu_item.restaurant_id)
+    if restaurant is None or not restaurant.is_active:
+        raise RestaurantInactiveException(menu_item.restaurant_id)
+    menu_snapshot = get_current_menu_snapshot(db, restaurant)
+    published_item = menu_snapshot.items.get(menu_item_id)
+    if published_item is None:
+        raise MenuItemNotFoundException(menu_item_id)
+    if not published_item["is_available"]:
+        raise MenuItemUnavailableException(menu_item_id)
+
+    line = {"menu_item_id": menu_item_id, "name": published_item["name"], "quantity": quantity, "unit_price": published_item["price"]}
+    others = [other for other in cart["items"] if other["menu_item_id"] != menu_item_id]
+    position = next((index for index, other in enumerate(cart["items"]) if other["menu_item_id"] == menu_item_id), len(others))
+    cart["items"] = others[:position] + [line] + others[position:]
+    cart["restaurant_id"] = restaurant.id
+    # The cart is known to match this version only if its other lines still do
+    changes, _ = _compare_with_menu(others, menu_snapshot)
+    cart["menu_version"] = None if changes else menu_snapshot.version
+
+
+def _store(db: Session, user_id: int, cart: dict) -> dict:
+    """Saves the cart, or deletes it once its last line is gone, and commits."""
+    if cart["items"]:
+        cart_store.save(db, user_id, cart)
+    else:
+        cart_store.delete(db, user_id)
+        cart = empty_cart()
+    db.commit()
+    return cart
+
+
+def load_cart(db: Session, user_id: int) -> dict:
+    """Returns the user's cart, empty if they have none or it expired."""
+    return cart_store.load(db, user_id) or empty_cart()
+
+
+def add_cart_item(db: Session, user_id: int, menu_item_id: int, quantity: int) -> dict:
+    """Adds `quantity` of a menu item to the cart, merging with its line if already there."""
+    cart = cart_store.load(db, user_id, for_update=True) or empty_cart()
+    current = next((line for line in cart["items"] if line["menu_item_id"] == menu_item_id), None)
+    _set_line(db, cart, menu_item_id, quantity + (current["quantity"] if current else 0))
+    return _store(db, user_id, cart)
+
+
+def update_cart_item(db: Session, user_id: int, menu_item_id: int, quantity: int) -> dict:
+    """Sets the quantity of a line already in the cart, revalidating its item."""
+    cart = cart_store.load(db, user_id, for_update=True) or empty_cart()
+    current = next((line for line in cart["items"] if line["menu_item_id"] == menu_item_id), None)
+    if current is None:
+        raise CartItemNotFoundException(menu_item_id)
+    _set_line(db, cart, menu_item_id, quantity)
+    return _store(db, user_id, cart)
+
+
+def remove_cart_item(db: Session, user_id: int, menu_item_id: int) -> dict:
+    """Removes a line from the cart."""
+    cart = cart_store.load(db, user_id, for_update=True) or empty_cart()
+    remaining = [line for line in cart["items"] if line["menu_item_id"] != menu_item_id]
+    if len(remaining) == len(cart["items"]):
+        raise CartItemNotFoundException(menu_item_id)
+    cart["items"] = remaining
+    return _store(db, user_id, cart)
+
+
+def clear_cart(db: Session, user_id: int):
+    """Empties the user's cart."""
+    cart_store.delete(db, user_id)
+    db.commit()
+
+
+def checkout_cart(db: Session, user_id: int):
+    """
+    Turns the cart into an order at the prices it holds. When the restaurant
+    has published a menu version since the cart was last validated, the lines
+    are compared with it first; if any changed price or became unavailable,
+    the cart is updated to match and CartChangedException lists the changes,
+    so the customer confirms the new total before checking out again.
+    """
+    cart = cart_store.load(db, user_id, for_update=True)
+    if cart is None:
+        raise EmptyCartException()
+    restaurant = get_restaurant(db, cart["restaurant_id"])
+    if restaurant is None:
+        raise RestaurantNotFoundException(cart["restaurant_id"])
+    if not restaurant.is_active:
+        raise RestaurantInactiveException(restaurant.id)
+
+    if cart["menu_version"] != restaurant.menu_version:
+        menu_snapshot = get_current_menu_snapshot(db, restaurant)
+        changes, cart["items"] = _compare_with_menu(cart["items"], menu_snapshot)
+        cart["menu_version"] = menu_snapshot.version
+        if changes:
+            _store(db, user_id, cart)
+            raise CartChangedException(changes)
+
+    # Committed by create_order_from_cart, together with the order
+    cart_store.delete(db, user_id)
+    return create_order_from_cart(db, user_id, restaurant.id, cart["items"], cart["menu_version"])
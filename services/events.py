@@ -0,0 +1,170 @@
+# services/events.py
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from database import DATABASE_URL, SessionLocal
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_BACKEND = settings.order_events_backend
+ORDER_EVENTS_CHANNEL = "order_events"
+
+# Key under Session.info where events wait for their transaction to commit (memory backend)
+_PENDING_EVENTS_KEY = "pending_order_events"
+
+
+class OrderEventBroker:
+    """
+    In-process pub/sub for order status transitions.
+
+    Subscribers are asyncio queues keyed by order ID. Delivery is thread-safe:
+    events published from a worker thread (sync path operations, the Postgres
+    listener) are handed to each subscriber's event loop.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, order_id: int) -> asyncio.Queue:
+        """Registers a queue that receives every event for the order. Must be called from the event loop."""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[order_id].add((asyncio.get_running_loop(), queue))
+        self.backend.start_listening()
+        return queue
+
+    def unsubscribe(self, order_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(order_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(order_id, None)
+
+    def queue(self, db: Session, order_event: dict):
+        """Queues an event in the session's transaction; it is published only if the transaction commits."""
+        self.backend.queue(db, order_event)
+
+    def deliver(self, order_event: dict):
+        """Hands an event to the local subscribers of its order."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_event["order_id"], ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, order_event)
+
+
+class InMemoryEventBackend:
+    """
+    Delivers events to subscribers in the publishing process only (single
+    worker deployments). Events wait in Session.info and are delivered once
+    the session commits.
+    """
+
+    def __init__(self, broker: OrderEventBroker):
+        self.broker = broker
+
+    def queue(self, db: Session, order_event: dict):
+        db.info.setdefault(_PENDING_EVENTS_KEY, []).append(order_event)
+
+    def start_listening(self):
+        pass
+
+
+class PostgresNotifyEventBackend:
+    """
+    Fans events out to every worker with Postgres LISTEN/NOTIFY.
+
+    The NOTIFY is sent inside the write's own transaction, on the connection it
+    already holds: Postgres delivers it when the transaction commits and drops
+    it on rollback, so an event cannot be lost between the commit and a
+    separate publish. Each process lazily starts one listener thread when its
+    first client subscribes. Its connection comes from a dedicated engine
+    without a pool, so it never takes a slot in the request pool.
+    Notifications, including the process's own, are delivered to local
+    subscribers from there.
+    """
+
+    def __init__(self, broker: OrderEventBroker, channel: str = ORDER_EVENTS_CHANNEL):
+        self.broker = broker
+        self.channel = channel
+        self._listener_engine = create_engine(DATABASE_URL, poolclass=NullPool)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def queue(self, db: Session, order_event: dict):
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self.channel, "payload": json.dumps(order_event)}
+        )
+
+    def start_listening(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="order-events-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        connection = self._listener_engine.raw_connection()
+        try:
+            driver_connection = connection.driver_connection
+            driver_connection.autocommit = True
+            with driver_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while True:
+                if select.select([driver_connection], [], [], 5.0) == ([], [], []):
+                    continue
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    notification = driver_connection.notifies.pop(0)
+                    self.broker.deliver(json.loads(notification.payload))
+        except Exception:
+            logger.exception("Order event listener stopped; it restarts on the next subscription")
+        finally:
+            connection.invalidate()
+
+
+broker = OrderEventBroker()
+broker.backend = (
+    PostgresNotifyEventBackend(broker) if ORDER_EVENTS_BACKEND == "postgres" else InMemoryEventBackend(broker)
+)
+
+
+def order_status_event(order) -> dict:
+    """Builds the event payload sent to subscribers for an order's current status."""
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "restaurant_id": order.restaurant_id,
+        "status": order.status.value,
+    }
+
+
+def queue_order_event(db: Session, order):
+    """
+    Queues a status event for an order modified in the session's current
+    transaction. It is published once the transaction commits and discarded on rollback.
+    """
+    broker.queue(db, order_status_event(order))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _deliver_committed_events(session: Session):
+    for order_event in session.info.pop(_PENDING_EVENTS_KEY, []):
+        broker.deliver(order_event)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_events(session: Session):
+    session.info.pop(_PENDING_EVENTS_KEY, None)
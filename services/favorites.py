@@ -0,0 +1,42 @@
+# services/favorites.py
+
+from threading import Lock
+from typing import FrozenSet
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+
+from crud.fevorites import get_favorite_restaurant_ids
+from settings import settings
+
+# Each worker keeps its own copy and only sees its own toggles, so a toggle
+# made through another worker shows up here once the entry expires. The TTL
+# is kept short to bound that staleness; the cache absorbs the bursts of
+# requests made while rendering restaurant lists.
+FAVORITE_IDS_CACHE_TTL_SECONDS = settings.favorite_ids_cache_ttl_seconds
+FAVORITE_IDS_CACHE_SIZE = 10_000
+
+_favorite_ids_cache: TTLCache = TTLCache(maxsize=FAVORITE_IDS_CACHE_SIZE, ttl=FAVORITE_IDS_CACHE_TTL_SECONDS)
+_favorite_ids_cache_lock = Lock()
+
+
+def get_cached_favorite_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    """Returns the IDs of the user's favorite restaurants, loading them in one query on a miss."""
+    with _favorite_ids_cache_lock:
+        cached = _favorite_ids_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    favorite_ids = frozenset(get_favorite_restaurant_ids(db, user_id))
+    with _favorite_ids_cache_lock:
+        _favorite_ids_cache[user_id] = favorite_ids
+    return favorite_ids
+
+
+def update_cached_favorite(user_id: int, restaurant_id: int, is_favorite: bool):
+    """Applies a committed toggle to the user's cached set, if one is cached."""
+    with _favorite_ids_cache_lock:
+        cached = _favorite_ids_cache.get(user_id)
+        if cached is not None:
+            _favorite_ids_cache[user_id] = cached | {restaurant_id} if is_favorite else cached - {restaurant_id}
+
@@ -0,0 +1,185 @@
+# services/leaderboard.py
+
+import math
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from crud.restaurants import get_restaurant_activity
+from settings import settings
+
+# Popularity halves every day; activity older than the window is never loaded
+TRENDING_HALF_LIFE = timedelta(hours=24)
+TRENDING_WINDOW = timedelta(days=7)
+ORDER_WEIGHT = 1.0
+FAVORITE_WEIGHT = 3.0
+# Each worker only sees its own writes; reloading from the database this often
+# brings in the orders and favorites handled by other workers and instances
+TRENDING_RESEED_SECONDS = settings.trending_reseed_seconds
+
+# Rebase stored scores before exp() growth gets anywhere near float limits
+_MAX_EXPONENT = 100.0
+
+
+class TrendingLeaderboard:
+    """
+    In-memory leaderboard of restaurants ranked by time-decayed activity.
+
+    Scores use forward decay: an event at time t contributes
+    weight * exp(decay * (t - landmark)), so older scores never have to be
+    touched when time passes and the ranking only changes on writes. Scores are
+    kept in a dict plus a sorted list of (score, restaurant_id), which makes a
+    top-K read a slice of the list's tail.
+
+    Each worker process keeps its own copy, seeded from the database on first
+    use and updated incrementally by the order and favorite writes it handles.
+    Writes handled by other workers reach it when refresh() reloads the scores,
+    at most every reseed_interval seconds.
+    """
+
+    def __init__(
+        self,
+        half_life: timedelta = TRENDING_HALF_LIFE,
+        window: timedelta = TRENDING_WINDOW,
+        order_weight: float = ORDER_WEIGHT,
+        favorite_weight: float = FAVORITE_WEIGHT,
+        reseed_interval: float = TRENDING_RESEED_SECONDS,
+    ):
+        self.decay = math.log(2) / half_life.total_seconds()
+        self.window = window
+        self.order_weight = order_weight
+        self.favorite_weight = favorite_weight
+        self.reseed_interval = reseed_interval
+        self.seeded = False
+        self._seeded_at = 0.0
+        # Database time of the last load's snapshot; events created up to it are in the scores
+        self._snapshot_at = 0.0
+        self._landmark = time.time()
+        self._scores: Dict[int, float] = {}
+        self._ranking: List[Tuple[float, int]] = []
+        # Favorites counted here since the last load, as (restaurant_id, timestamp)
+        self._recorded_favorites: Set[Tuple[int, float]] = set()
+        # Events recorded while a load is running, replayed onto its result
+        # unless the load's snapshot already included them
+        self._replay: Optional[List[Tuple[int, float, float]]] = None
+        self._lock = Lock()
+        self._load_lock = Lock()
+
+    def seed(self, db: Session):
+        """Loads the scores from the database, unless they already were."""
+        if not self.seeded:
+            self._load(db)
+
+    def refresh(self, db: Session):
+        """Reloads the scores from the database once they are older than reseed_interval."""
+        if not self.seeded or time.time() - self._seeded_at >= self.reseed_interval:
+            self._load(db)
+
+    def _load(self, db: Session):
+        """Replaces the scores with decayed order and favorite activity within the window, read from the database."""
+        # Once seeded, requests keep reading the current scores while one thread reloads
+        if not self._load_lock.acquire(blocking=not self.seeded):
+            return
+        try:
+            if self.seeded and time.time() - self._seeded_at < self.reseed_interval:
+                return # Reloaded by another thread meanwhile
+            now = time.time()
+            with self._lock:
+                self._replay = []
+            since = datetime.fromtimestamp(now, timezone.utc) - self.window
+            activity, snapshot_at = get_restaurant_activity(db, since=since, landmark=now, decay=self.decay)
+            scores = {
+                restaurant_id: self.order_weight * orders_score + self.favorite_weight * favorites_score
+                for restaurant_id, orders_score, favorites_score in activity
+            }
+            with self._lock:
+                replay, self._replay = self._replay, None
+                self._landmark = now
+                self._scores = scores
+                self._ranking = sorted((score, restaurant_id) for restaurant_id, score in scores.items())
+                # Older favorites count as loaded from now on
+                self._recorded_favorites = {favorite for favorite in self._recorded_favorites if favorite[1] > snapshot_at}
+                self._seeded_at = now
+                self._snapshot_at = snapshot_at
+                self.seeded = True
+                # An event created before the snapshot is already in the loaded scores.
+                # One whose transaction started before the snapshot but committed
+                # after it is missed until the next reload.
+                for restaurant_id, weight, timestamp in replay:
+                    if timestamp > snapshot_at:
+                        self._apply(restaurant_id, weight, timestamp)
+        finally:
+            self._load_lock.release()
+
+    def record_order(self, restaurant_id: int, at: Optional[datetime] = None):
+        """Counts a newly placed order."""
+        self._record(restaurant_id, self.order_weight, at)
+
+    def record_favorite(self, restaurant_id: int, at: Optional[datetime] = None):
+        """Counts a newly added favorite."""
+        timestamp = self._record(restaurant_id, self.favorite_weight, at)
+        if timestamp is not None:
+            with self._lock:
+                self._recorded_favorites.add((restaurant_id, timestamp))
+
+    def remove_favorite(self, restaurant_id: int, favorited_at: datetime):
+        """
+        Withdraws exactly the contribution a favorite made when it was added,
+        if this copy counted it: either it was loaded from the database or
+        added through this worker since.
+        """
+        timestamp = favorited_at.timestamp()
+        if timestamp < time.time() - self.window.total_seconds():
+            return # Never loaded into the leaderboard
+        with self._lock:
+            counted = timestamp <= self._snapshot_at or (restaurant_id, timestamp) in self._recorded_favorites
+            self._recorded_favorites.discard((restaurant_id, timestamp))
+        if counted:
+            self._record(restaurant_id, -self.favorite_weight, favorited_at)
+        # Otherwise it was added through another worker and the next reload drops it
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """Returns the k highest ranked (restaurant_id, score) pairs, scores decayed to now."""
+        with self._lock:
+            scale = math.exp(-self.decay * (time.time() - self._landmark))
+            return [(restaurant_id, score * scale) for score, restaurant_id in reversed(self._ranking[-k:])] if k > 0 else []
+
+    def _record(self, restaurant_id: int, weight: float, at: Optional[datetime]) -> Optional[float]:
+        """Applies an event and returns its timestamp, or None if it was left to the database."""
+        # Until seeded, the database is the source of truth and will include this event
+        if not self.seeded:
+            return None
+        timestamp = at.timestamp() if at else time.time()
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((restaurant_id, weight, timestamp))
+            self._apply(restaurant_id, weight, timestamp)
+        return timestamp
+
+    def _apply(self, restaurant_id: int, weight: float, timestamp: float):
+        """Adds a weighted event to a restaurant's score. The caller holds the lock."""
+        if self.decay * (timestamp - self._landmark) > _MAX_EXPONENT:
+            self._rebase(timestamp)
+        old = self._scores.get(restaurant_id)
+        if old is not None:
+            del self._ranking[bisect_left(self._ranking, (old, restaurant_id))]
+        new = (old or 0.0) + weight * math.exp(self.decay * (timestamp - self._landmark))
+        if new > 1e-9:
+            self._scores[restaurant_id] = new
+            insort(self._ranking, (new, restaurant_id))
+        else:
+            self._scores.pop(restaurant_id, None)
+
+    def _rebase(self, landmark: float):
+        """Moves the landmark forward; scaling every score by the same factor keeps the order."""
+        scale = math.exp(-self.decay * (landmark - self._landmark))
+        self._landmark = landmark
+        self._scores = {restaurant_id: score * scale for restaurant_id, score in self._scores.items()}
+        self._ranking = [(score * scale, restaurant_id) for score, restaurant_id in self._ranking]
+
+
+leaderboard = TrendingLeaderboard()
@@ -0,0 +1,71 @@
+# services/menu_versions.py
+#
+# Published menu versions never change, so each worker caches them by
+# (restaurant_id, version) with no expiry and nothing to invalidate: a menu
+# change publishes a new version under a new key, and versions nobody asks
+# for any more fall out of the LRU. The rendered JSON is served as is by
+# GET /restaurants/{id}/menu/versions/{version}, and orders and carts are
+# priced from the parsed items instead of loading menu rows.
+
+import json
+from threading import Lock
+from typing import Dict, Optional
+
+from cachetools import LRUCache
+from sqlalchemy.orm import Session
+
+from crud.menu import get_menu_version
+from crud.restaurants import get_restaurant
+from exceptions import MenuVersionNotFoundException
+from schemas.menu import MenuVersionResponse
+
+MENU_SNAPSHOT_CACHE_SIZE = 5_000
+
+
+class MenuSnapshot:
+    """A published menu version: its rendered JSON body and its items by ID."""
+
+    def __init__(self, restaurant_id: int, version: int, body: str):
+        self.restaurant_id = restaurant_id
+        self.version = version
+        self.body = body.encode()
+        self.items: Dict[int, dict] = {item["id"]: item for item in json.loads(body)["items"]}
+
+
+_snapshots: LRUCache = LRUCache(maxsize=MENU_SNAPSHOT_CACHE_SIZE)
+_snapshots_lock = Lock()
+
+
+def get_menu_snapshot(db: Session, restaurant_id: int, version: int) -> Optional[MenuSnapshot]:
+    """
+    Returns a published menu version, loading it in one query on a miss, or
+    None if it does not exist. Version 0 is the empty menu of a restaurant
+    that has never had menu items.
+    """
+    key = (restaurant_id, version)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    if version == 0:
+        if get_restaurant(db, restaurant_id) is None:
+            return None
+        body = MenuVersionResponse(restaurant_id=restaurant_id, version=0, items=[]).model_dump_json()
+    else:
+        db_menu_version = get_menu_version(db, restaurant_id, version)
+        if db_menu_version is None:
+            return None
+        body = db_menu_version.body
+    snapshot = MenuSnapshot(restaurant_id, version, body)
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def get_current_menu_snapshot(db: Session, restaurant) -> MenuSnapshot:
+    """Returns the restaurant's current menu version; raises MenuVersionNotFoundException if it is missing."""
+    snapshot = get_menu_snapshot(db, restaurant.id, restaurant.menu_version)
+    if snapshot is None:
+        raise MenuVersionNotFoundException(restaurant.id, restaurant.menu_version)
+    return snapshot
@@ -0,0 +1,116 @@
+# services/outbox.py
+#
+# Delivers events written to the outbox_events table by crud/ write paths.
+# Runs as an asyncio task inside the API (see main.py) or as its own process:
+#
+#     python -m services.outbox
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from crud.outbox import claim_outbox_events, mark_outbox_event_processed, mark_outbox_event_failed
+from database import SessionLocal
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCH_IN_APP = settings.outbox_dispatch_in_app
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_INTERVAL_SECONDS = 1.0
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE_SECONDS = 2.0
+
+OutboxHandler = Callable[[dict], None]
+_handlers: Dict[str, List[OutboxHandler]] = defaultdict(list)
+
+
+def outbox_handler(event_type: str):
+    """
+    Decorator registering a handler for an outbox event type.
+    Handlers receive the event payload and must be idempotent: an event is
+    retried if any of its handlers raises.
+    """
+    def register(handler: OutboxHandler) -> OutboxHandler:
+        _handlers[event_type].append(handler)
+        return handler
+    return register
+
+
+def dispatch_outbox_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Claims one batch of due events, runs their handlers and records the outcome
+    in a single transaction. Returns the number of events claimed.
+    """
+    db = SessionLocal()
+    try:
+        db_events = claim_outbox_events(db, batch_size=batch_size)
+        for db_event in db_events:
+            try:
+                for handler in _handlers.get(db_event.event_type, []):
+                    handler(db_event.payload)
+                mark_outbox_event_processed(db_event)
+            except Exception as e:
+                retry_delay = timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** db_event.attempts)
+                logger.warning(f"Outbox event {db_event.id} ({db_event.event_type}) failed: {e}")
+                mark_outbox_event_failed(db_event, str(e), max_attempts=OUTBOX_MAX_ATTEMPTS, retry_delay=retry_delay)
+        db.commit()
+        return len(db_events)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class OutboxDispatcher:
+    """Polls the outbox in a background thread, draining full batches back to back."""
+
+    def __init__(self, poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = await asyncio.to_thread(dispatch_outbox_batch, self.batch_size)
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Lets the batch in progress finish, then stops."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+# --- Handlers ---
+
+@outbox_handler("order.created")
+def notify_restaurant(payload: dict):
+    """Tells the restaurant about a new order. Logged until a notification channel exists."""
+    logger.info(f"New order {payload['order_id']} for restaurant {payload['restaurant_id']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(outbox_dispatcher.run())
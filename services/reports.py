@@ -0,0 +1,182 @@
+# services/reports.py
+
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+
+from crud.reports import stream_order_lines, get_menu_item_names
+from schemas.reports import ReportPeriod
+
+# Column layout of the numeric batches produced by crud.reports.stream_order_lines
+ORDER_ID, HOUR, MENU_ITEM_ID, QUANTITY, PRICE = range(5)
+
+PERIOD_LENGTHS = {
+    ReportPeriod.DAY: timedelta(days=1),
+    ReportPeriod.WEEK: timedelta(days=7),
+    ReportPeriod.MONTH: timedelta(days=30),
+}
+
+# Reports are cached per (restaurant_id, period) for a few minutes
+REPORT_CACHE_TTL_SECONDS = 300
+_report_cache: TTLCache = TTLCache(maxsize=1024, ttl=REPORT_CACHE_TTL_SECONDS)
+_report_cache_lock = Lock()
+
+
+class ReportAccumulator:
+    """
+    Accumulates order line batches into NumPy aggregates.
+
+    Each batch is a (rows, 5) float array laid out as
+    (order_id, hour, menu_item_id, quantity, price). Batches must be ordered by
+    order_id; an order split across two batches is carried over to the next one
+    so that basket co-occurrence is counted on complete orders only.
+    """
+
+    def __init__(self):
+        self.item_ids = np.empty(0, dtype=np.int64)
+        self.quantity = np.zeros(0)
+        self.revenue = np.zeros(0)
+        self.co_occurrence = np.zeros((0, 0))
+        self.hourly_orders = np.zeros(24)
+        self.hourly_revenue = np.zeros(24)
+        self.order_count = 0
+        self._carry = np.empty((0, 5))
+
+    def add_batch(self, batch: np.ndarray):
+        """Adds a batch of order lines, holding back the (possibly incomplete) last order."""
+        batch = np.concatenate([self._carry, batch]) if len(self._carry) else batch
+        if not len(batch):
+            return
+        last_order = batch[-1, ORDER_ID]
+        split = np.searchsorted(batch[:, ORDER_ID], last_order)
+        self._carry = batch[split:]
+        self._accumulate(batch[:split])
+
+    def finish(self):
+        """Flushes the carried-over order. Must be called once after the last batch."""
+        carry, self._carry = self._carry, np.empty((0, 5))
+        self._accumulate(carry)
+        return self
+
+    def _register_items(self, batch_item_ids: np.ndarray):
+        """Grows the item axis of every accumulator when unseen menu items appear."""
+        new_ids = np.setdiff1d(batch_item_ids, self.item_ids, assume_unique=False)
+        if not len(new_ids):
+            return
+        all_ids = np.union1d(self.item_ids, new_ids)
+        old_positions = np.searchsorted(all_ids, self.item_ids)
+        size = len(all_ids)
+
+        quantity, revenue = np.zeros(size), np.zeros(size)
+        quantity[old_positions] = self.quantity
+        revenue[old_positions] = self.revenue
+        co_occurrence = np.zeros((size, size))
+        co_occurrence[np.ix_(old_positions, old_positions)] = self.co_occurrence
+
+        self.item_ids, self.quantity, self.revenue, self.co_occurrence = all_ids, quantity, revenue, co_occurrence
+
+    def _accumulate(self, batch: np.ndarray):
+        if not len(batch):
+            return
+        order_ids = batch[:, ORDER_ID]
+        hours = batch[:, HOUR].astype(np.int64)
+        item_ids = batch[:, MENU_ITEM_ID].astype(np.int64)
+        quantity = batch[:, QUANTITY]
+        line_revenue = quantity * batch[:, PRICE]
+
+        self._register_items(np.unique(item_ids))
+        columns = np.searchsorted(self.item_ids, item_ids)
+        size = len(self.item_ids)
+
+        # Per-dish sales
+        self.quantity += np.bincount(columns, weights=quantity, minlength=size)
+        self.revenue += np.bincount(columns, weights=line_revenue, minlength=size)
+
+        # Time-of-day demand (orders counted once, on their first line)
+        order_starts = np.r_[True, order_ids[1:] != order_ids[:-1]]
+        self.order_count += int(order_starts.sum())
+        self.hourly_orders += np.bincount(hours[order_starts], minlength=24)
+        self.hourly_revenue += np.bincount(hours, weights=line_revenue, minlength=24)
+
+        # Basket co-occurrence: X.T @ X over the order x item incidence matrix
+        rows = np.cumsum(order_starts) - 1
+        incidence = np.zeros((rows[-1] + 1, size), dtype=np.float32)
+        incidence[rows, columns] = 1.0
+        self.co_occurrence += incidence.T @ incidence
+
+    def top_pairs(self, limit: int = 10):
+        """Returns the most frequently co-ordered item pairs as (item_a, item_b, orders)."""
+        if len(self.item_ids) < 2:
+            return []
+        upper_i, upper_j = np.triu_indices(len(self.item_ids), k=1)
+        counts = self.co_occurrence[upper_i, upper_j]
+        top = np.argsort(counts)[::-1][:limit]
+        top = top[counts[top] > 0]
+        return [
+            (int(self.item_ids[upper_i[k]]), int(self.item_ids[upper_j[k]]), int(counts[k]))
+            for k in top
+        ]
+
+
+def build_restaurant_report(db: Session, restaurant_id: int, period: ReportPeriod) -> Dict:
+    """Streams a restaurant's orders for the period and computes the vectorized report."""
+    generated_at = datetime.now(timezone.utc)
+    accumulator = ReportAccumulator()
+    for partition in stream_order_lines(db, restaurant_id, since=generated_at - PERIOD_LENGTHS[period]):
+        accumulator.add_batch(np.asarray(partition, dtype=np.float64))
+    accumulator.finish()
+
+    pairs = accumulator.top_pairs()
+    names = get_menu_item_names(db, accumulator.item_ids.tolist())
+    order = np.argsort(accumulator.revenue)[::-1]
+
+    return {
+        "restaurant_id": restaurant_id,
+        "period": period,
+        "generated_at": generated_at,
+        "order_count": accumulator.order_count,
+        "revenue": float(accumulator.revenue.sum()),
+        "dish_sales": [
+            {
+                "menu_item_id": int(accumulator.item_ids[k]),
+                "name": names.get(int(accumulator.item_ids[k])),
+                "quantity": int(accumulator.quantity[k]),
+                "revenue": float(accumulator.revenue[k]),
+                "order_count": int(accumulator.co_occurrence[k, k]),
+            }
+            for k in order
+        ],
+        "top_pairs": [
+            {"menu_item_ids": [a, b], "names": [names.get(a), names.get(b)], "order_count": count}
+            for a, b, count in pairs
+        ],
+        "hourly_demand": [
+            {"hour": hour, "order_count": int(accumulator.hourly_orders[hour]), "revenue": float(accumulator.hourly_revenue[hour])}
+            for hour in range(24)
+        ],
+    }
+
+
+def get_restaurant_report(db: Session, restaurant_id: int, period: ReportPeriod, refresh: bool = False) -> Dict:
+    """Returns the cached report for (restaurant_id, period), building it on a miss."""
+    key: Tuple[int, ReportPeriod] = (restaurant_id, period)
+    if not refresh:
+        with _report_cache_lock:
+            cached = _report_cache.get(key)
+        if cached is not None:
+            return cached
+
+    report = build_restaurant_report(db, restaurant_id, period)
+    with _report_cache_lock:
+        _report_cache[key] = report
+    return report
+
+
+def clear_report_cache():
+    """Drops every cached report."""
+    with _report_cache_lock:
+        _report_cache.clear()
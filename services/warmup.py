@@ -0,0 +1,137 @@
+# services/warmup.py
+#
+# Startup warm-up, run by each worker in the background from the lifespan
+# hook (see main.py). Until it completes, GET /ready answers 503 so the load
+# balancer keeps traffic on warm instances:
+#
+# - opens the connections of the primary and replica pools up front, instead
+#   of during the first requests;
+# - runs the statements behind the hottest endpoints once on every engine,
+#   which fills SQLAlchemy's compiled statement cache (kept per engine) and
+#   pulls the rows of the trending restaurants into the database's buffer cache;
+# - seeds the in-memory trending leaderboard and caches the current menu
+#   version of the trending restaurants, which orders and carts are priced from.
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from crud.menu import get_menu_items_by_restaurant, get_menu_items_by_restaurant_ids
+from crud.restaurants import get_restaurants_with_relations, get_latest_reviews_by_restaurant, get_restaurant
+from crud.reviews import get_reviews_by_restaurant, get_review_stats
+from crud.search import search_restaurants_and_dishes
+from crud.users import get_user_by_email
+from database import SessionLocal, ReadSessionLocal, engine, replica_router
+from services.leaderboard import leaderboard
+from services.menu_versions import get_menu_snapshot
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RETRY_SECONDS = 2.0
+
+
+def open_pool_connections(target: Engine):
+    """Checks out as many connections as the pool keeps, all at once, then returns them to it."""
+    connections = []
+    try:
+        for _ in range(target.pool.size()):
+            connections.append(target.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def hot_restaurant_ids(db: Session, restaurant_count: int) -> List[int]:
+    """Returns the trending restaurants, topped up with the first page of active restaurants."""
+    restaurant_ids = [restaurant_id for restaurant_id, _ in leaderboard.top(restaurant_count)]
+    for restaurant, _ in get_restaurants_with_relations(db, limit=restaurant_count):
+        if len(restaurant_ids) >= restaurant_count:
+            break
+        if restaurant.is_active and restaurant.id not in restaurant_ids:
+            restaurant_ids.append(restaurant.id)
+    return restaurant_ids
+
+
+def run_hot_statements(db: Session, restaurant_ids: List[int]):
+    """Runs the queries of the most requested endpoints for these restaurants."""
+    get_restaurants_with_relations(db, restaurant_ids=restaurant_ids, include_favorite_count=True)
+    get_menu_items_by_restaurant_ids(db, restaurant_ids)
+    get_restaurants_with_relations(db, limit=len(restaurant_ids))
+    get_latest_reviews_by_restaurant(db, restaurant_ids)
+    for restaurant_id in restaurant_ids:
+        get_restaurant(db, restaurant_id)
+        get_menu_items_by_restaurant(db, restaurant_id=restaurant_id)
+        get_reviews_by_restaurant(db, restaurant_id=restaurant_id)
+        get_review_stats(db, restaurant_id)
+    search_restaurants_and_dishes(db)
+    search_restaurants_and_dishes(db, query="a")
+    get_user_by_email(db, "")
+
+
+def warm_up(restaurant_count: int = settings.warmup_restaurants):
+    """
+    Warms the pools, statement caches and leaderboard. Raises if the primary
+    cannot be reached; a failing replica is only logged, since reads fall
+    back to the primary without it.
+    """
+    open_pool_connections(engine)
+    db = SessionLocal()
+    try:
+        leaderboard.seed(db)
+        restaurant_ids = hot_restaurant_ids(db, restaurant_count)
+        run_hot_statements(db, restaurant_ids)
+        for restaurant_id in restaurant_ids:
+            restaurant = get_restaurant(db, restaurant_id)
+            if restaurant is not None:
+                get_menu_snapshot(db, restaurant_id, restaurant.menu_version)
+    finally:
+        db.close()
+
+    for replica in replica_router.replicas:
+        db = ReadSessionLocal(bind=replica)
+        try:
+            open_pool_connections(replica)
+            run_hot_statements(db, restaurant_ids)
+        except Exception as e:
+            logger.warning(f"Warm-up of read replica {replica.url.render_as_string(hide_password=True)} failed: {e}")
+        finally:
+            db.close()
+
+
+class Warmup:
+    """Runs warm_up in a background thread, retrying until it succeeds, and tracks readiness."""
+
+    def __init__(self):
+        self.ready = not settings.warmup_enabled
+        self.duration: Optional[float] = None
+        self._task = None
+
+    async def run(self):
+        started = time.monotonic()
+        while True:
+            try:
+                await asyncio.to_thread(warm_up)
+                break
+            except Exception:
+                logger.exception("Warm-up failed; retrying")
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        self.duration = time.monotonic() - started
+        self.ready = True
+        logger.info(f"Warm-up completed in {self.duration:.2f}s")
+
+    def start(self):
+        if not self.ready:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+warmup = Warmup()
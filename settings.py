@@ -0,0 +1,92 @@
+# settings.py
+#
+# Application configuration, read once from the environment and the .env file
+# when this module is first imported. Every module takes its configuration
+# from `settings` instead of calling load_dotenv() and os.getenv() itself.
+# Environment variable names are the field names in upper case.
+
+from typing import List, Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Database
+    database_url: str
+    # Comma-separated read replica URLs; without any, reads use the primary
+    database_replica_urls: str = ""
+    replica_balancing: Literal["least_connections", "round_robin"] = "least_connections"
+    # How long a user's reads stay on the primary after one of their writes, to cover replication lag
+    read_your_writes_seconds: float = 5
+
+    # JWT
+    secret_key: Optional[str] = None
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 60
+
+    # "memory" delivers order events within this process only; "postgres" fans
+    # out across workers through LISTEN/NOTIFY on the application database
+    order_events_backend: Literal["memory", "postgres"] = "memory"
+    # Deliver outbox events from the API workers; false when `python -m services.outbox` runs separately
+    outbox_dispatch_in_app: bool = True
+
+    # Rate limiting: "memory" limits each worker process separately; "postgres"
+    # shares buckets between workers and instances through an UNLOGGED table
+    rate_limit_enabled: bool = True
+    rate_limit_backend: Literal["memory", "postgres"] = "memory"
+    # Requests one client may have in flight at once, per worker process
+    max_concurrent_requests_per_client: int = 10
+
+    # Load shedding
+    load_shedding_enabled: bool = True
+    # Pool checkout time above which the database is considered saturated
+    target_pool_wait_ms: float = 50
+    # The default pool holds 5 connections plus 10 overflow
+    initial_concurrency_limit: float = 15
+    max_concurrency_limit: float = 60
+
+    # Compression: responses smaller than compression_min_size are sent uncompressed
+    compression_min_size: int = 1024
+    # Comma-separated encodings the server may use, in order of preference
+    compression_encodings: str = "br,gzip"
+    gzip_level: int = 6
+    # 4-6 trades ratio for speed on dynamic responses; 11 is meant for static assets
+    brotli_quality: int = 5
+
+    # Seconds between reloads of each worker's trending leaderboard from the database
+    trending_reseed_seconds: float = 60
+
+    # Seconds each worker caches a user's favorite restaurant IDs (GET /favorites/ids)
+    favorite_ids_cache_ttl_seconds: float = 5
+
+    # Startup warm-up (services/warmup.py); GET /ready answers 503 until it completes
+    warmup_enabled: bool = True
+    # Restaurants whose menus, reviews and statements are loaded during warm-up
+    warmup_restaurants: int = 50
+
+    # Carts (services/cart.py): "postgres" shares them between workers and
+    # instances through the carts table; "memory" keeps them in each worker process
+    cart_backend: Literal["memory", "postgres"] = "postgres"
+    # Carts expire this long after their last change
+    cart_ttl_seconds: int = 86400
+
+    # Where archived order partitions are written (a local path or a mounted bucket)
+    orders_archive_dir: str = "archive/orders"
+
+    # Server profile (gunicorn.conf.py); web_concurrency defaults to the CPU count
+    bind: str = "0.0.0.0:8000"
+    web_concurrency: Optional[int] = None
+    max_requests: int = 10000
+    max_requests_jitter: int = 1000
+    graceful_timeout: int = 30
+    forwarded_allow_ips: str = "127.0.0.1"
+
+    @staticmethod
+    def split(value: str) -> List[str]:
+        """Splits a comma-separated setting into its non-empty items."""
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+
+settings = Settings()
@@ -0,0 +1,85 @@
+# tests/test_reports.py
+#
+# Correctness checks for the vectorized report engine (services/reports.py) on
+# hand-built batches, no database required:
+#
+#     python -m pytest tests
+
+import os
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # services import the models; no connection is made
+
+from services.reports import ReportAccumulator
+
+# (order_id, hour, menu_item_id, quantity, price)
+FIRST_BATCH = np.array([
+    [1, 10, 1, 2, 5.0],
+    [1, 10, 2, 1, 3.0],
+    [2, 11, 1, 1, 5.0],  # Order 2 continues in the next batch
+])
+SECOND_BATCH = np.array([
+    [2, 11, 3, 2, 4.0],  # Item 3 is first seen here
+    [3, 11, 3, 1, 4.0],
+    [3, 11, 2, 1, 3.0],
+])
+
+
+def build(*batches) -> ReportAccumulator:
+    accumulator = ReportAccumulator()
+    for batch in batches:
+        accumulator.add_batch(batch)
+    return accumulator.finish()
+
+
+def item_counts(accumulator: ReportAccumulator, values: np.ndarray) -> dict:
+    return {int(item_id): float(value) for item_id, value in zip(accumulator.item_ids, values)}
+
+
+def test_split_order_is_carried_to_the_next_batch():
+    accumulator = ReportAccumulator()
+    accumulator.add_batch(FIRST_BATCH)
+    # Only order 1 is complete; order 2 waits for the rest of its lines
+    assert accumulator.order_count == 1
+    assert item_counts(accumulator, accumulator.quantity) == {1: 2, 2: 1}
+
+    accumulator.add_batch(SECOND_BATCH)
+    accumulator.finish()
+    assert accumulator.order_count == 3
+
+
+def test_per_item_totals_across_batches():
+    accumulator = build(FIRST_BATCH, SECOND_BATCH)
+    assert accumulator.item_ids.tolist() == [1, 2, 3]
+    assert item_counts(accumulator, accumulator.quantity) == {1: 3, 2: 2, 3: 3}
+    assert item_counts(accumulator, accumulator.revenue) == {1: 15.0, 2: 6.0, 3: 12.0}
+    # The diagonal counts the orders containing each item
+    assert item_counts(accumulator, np.diag(accumulator.co_occurrence)) == {1: 2, 2: 2, 3: 2}
+
+
+def test_hourly_demand_counts_each_order_once():
+    accumulator = build(FIRST_BATCH, SECOND_BATCH)
+    assert accumulator.hourly_orders[10] == 1
+    assert accumulator.hourly_orders[11] == 2
+    assert accumulator.hourly_orders.sum() == 3
+    assert accumulator.hourly_revenue[10] == 13.0
+    assert accumulator.hourly_revenue[11] == 20.0
+
+
+def test_pairs_survive_item_axis_growth():
+    accumulator = build(FIRST_BATCH, SECOND_BATCH)
+    # (1, 2) was counted before item 3 grew the axis; (1, 3) only exists if order 2 was kept whole
+    assert sorted(accumulator.top_pairs()) == [(1, 2, 1), (1, 3, 1), (2, 3, 1)]
+    assert np.array_equal(accumulator.co_occurrence, accumulator.co_occurrence.T)
+
+
+def test_same_result_whatever_the_batch_boundaries():
+    rows = np.concatenate([FIRST_BATCH, SECOND_BATCH])
+    whole = build(rows)
+    for batch_size in (1, 2, 4):
+        batched = build(*(rows[start:start + batch_size] for start in range(0, len(rows), batch_size)))
+        assert batched.order_count == whole.order_count
+        assert np.array_equal(batched.item_ids, whole.item_ids)
+        assert np.array_equal(batched.quantity, whole.quantity)
+        assert np.array_equal(batched.co_occurrence, whole.co_occurrence)